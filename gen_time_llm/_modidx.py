@@ -5,17 +5,317 @@ d = { 'settings': { 'branch': 'main',
                 'doc_host': 'https://thamolwanpo.github.io',
                 'git_url': 'https://github.com/thamolwanpo/gen-time-llm',
                 'lib_path': 'gen_time_llm'},
-  'syms': { 'gen_time_llm.models.gru': { 'gen_time_llm.models.gru.GRUGPTModel': ( 'models.gru.html#grugptmodel',
+  'syms': { 'gen_time_llm.datamodule': { 'gen_time_llm.datamodule.TimeSeriesDataModule': ( 'datamodule.html#timeseriesdatamodule',
+                                                                                           'gen_time_llm/datamodule.py'),
+                                         'gen_time_llm.datamodule.TimeSeriesDataModule.__init__': ( 'datamodule.html#timeseriesdatamodule.__init__',
+                                                                                                    'gen_time_llm/datamodule.py'),
+                                         'gen_time_llm.datamodule.TimeSeriesDataModule.test_dataloader': ( 'datamodule.html#timeseriesdatamodule.test_dataloader',
+                                                                                                           'gen_time_llm/datamodule.py'),
+                                         'gen_time_llm.datamodule.TimeSeriesDataModule.train_dataloader': ( 'datamodule.html#timeseriesdatamodule.train_dataloader',
+                                                                                                            'gen_time_llm/datamodule.py'),
+                                         'gen_time_llm.datamodule.TimeSeriesDataModule.val_dataloader': ( 'datamodule.html#timeseriesdatamodule.val_dataloader',
+                                                                                                          'gen_time_llm/datamodule.py')},
+            'gen_time_llm.distill': { 'gen_time_llm.distill.DistillationModel': ( 'distill.html#distillationmodel',
+                                                                                  'gen_time_llm/distill.py'),
+                                      'gen_time_llm.distill.DistillationModel.__init__': ( 'distill.html#distillationmodel.__init__',
+                                                                                           'gen_time_llm/distill.py'),
+                                      'gen_time_llm.distill.DistillationModel.configure_optimizers': ( 'distill.html#distillationmodel.configure_optimizers',
+                                                                                                       'gen_time_llm/distill.py'),
+                                      'gen_time_llm.distill.DistillationModel.forward': ( 'distill.html#distillationmodel.forward',
+                                                                                          'gen_time_llm/distill.py'),
+                                      'gen_time_llm.distill.DistillationModel.generate_summaries': ( 'distill.html#distillationmodel.generate_summaries',
+                                                                                                     'gen_time_llm/distill.py'),
+                                      'gen_time_llm.distill.DistillationModel.reference_summaries': ( 'distill.html#distillationmodel.reference_summaries',
+                                                                                                      'gen_time_llm/distill.py'),
+                                      'gen_time_llm.distill._blocks_prefix': ('distill.html#_blocks_prefix', 'gen_time_llm/distill.py'),
+                                      'gen_time_llm.distill.distillation_loss': ( 'distill.html#distillation_loss',
+                                                                                  'gen_time_llm/distill.py'),
+                                      'gen_time_llm.distill.evaluate_student': ('distill.html#evaluate_student', 'gen_time_llm/distill.py'),
+                                      'gen_time_llm.distill.export_student': ('distill.html#export_student', 'gen_time_llm/distill.py'),
+                                      'gen_time_llm.distill.make_student': ('distill.html#make_student', 'gen_time_llm/distill.py'),
+                                      'gen_time_llm.distill.swap_decoder': ('distill.html#swap_decoder', 'gen_time_llm/distill.py')},
+            'gen_time_llm.evaluation': { 'gen_time_llm.evaluation._batch_records': ( 'evaluation.html#_batch_records',
+                                                                                     'gen_time_llm/evaluation.py'),
+                                         'gen_time_llm.evaluation._finished_records': ( 'evaluation.html#_finished_records',
+                                                                                        'gen_time_llm/evaluation.py'),
+                                         'gen_time_llm.evaluation._to_device': ('evaluation.html#_to_device', 'gen_time_llm/evaluation.py'),
+                                         'gen_time_llm.evaluation.evaluate': ('evaluation.html#evaluate', 'gen_time_llm/evaluation.py'),
+                                         'gen_time_llm.evaluation.evaluation_summary': ( 'evaluation.html#evaluation_summary',
+                                                                                         'gen_time_llm/evaluation.py'),
+                                         'gen_time_llm.evaluation.load_model': ( 'evaluation.html#load_model',
+                                                                                 'gen_time_llm/evaluation.py')},
+            'gen_time_llm.export': { 'gen_time_llm.export.GRUPrefixEncoder': ('export.html#gruprefixencoder', 'gen_time_llm/export.py'),
+                                     'gen_time_llm.export.GRUPrefixEncoder.__init__': ( 'export.html#gruprefixencoder.__init__',
+                                                                                        'gen_time_llm/export.py'),
+                                     'gen_time_llm.export.GRUPrefixEncoder.forward': ( 'export.html#gruprefixencoder.forward',
+                                                                                       'gen_time_llm/export.py'),
+                                     'gen_time_llm.export.TimeLLMPatchEncoder': ( 'export.html#timellmpatchencoder',
+                                                                                  'gen_time_llm/export.py'),
+                                     'gen_time_llm.export.TimeLLMPatchEncoder.__init__': ( 'export.html#timellmpatchencoder.__init__',
+                                                                                           'gen_time_llm/export.py'),
+                                     'gen_time_llm.export.TimeLLMPatchEncoder.forward': ( 'export.html#timellmpatchencoder.forward',
+                                                                                          'gen_time_llm/export.py'),
+                                     'gen_time_llm.export.export_encoder': ('export.html#export_encoder', 'gen_time_llm/export.py'),
+                                     'gen_time_llm.export.load_encoder': ('export.html#load_encoder', 'gen_time_llm/export.py')},
+            'gen_time_llm.generation': { 'gen_time_llm.generation._TextDelta': ('generation.html#_textdelta', 'gen_time_llm/generation.py'),
+                                         'gen_time_llm.generation._TextDelta.__init__': ( 'generation.html#_textdelta.__init__',
+                                                                                          'gen_time_llm/generation.py'),
+                                         'gen_time_llm.generation._TextDelta.push': ( 'generation.html#_textdelta.push',
+                                                                                      'gen_time_llm/generation.py'),
+                                         'gen_time_llm.generation.stream_generate': ( 'generation.html#stream_generate',
+                                                                                      'gen_time_llm/generation.py')},
+            'gen_time_llm.metrics': { 'gen_time_llm.metrics._lcs_length': ('metrics.html#_lcs_length', 'gen_time_llm/metrics.py'),
+                                      'gen_time_llm.metrics._tokens': ('metrics.html#_tokens', 'gen_time_llm/metrics.py'),
+                                      'gen_time_llm.metrics.bleu': ('metrics.html#bleu', 'gen_time_llm/metrics.py'),
+                                      'gen_time_llm.metrics.pair_metrics': ('metrics.html#pair_metrics', 'gen_time_llm/metrics.py'),
+                                      'gen_time_llm.metrics.rouge_l': ('metrics.html#rouge_l', 'gen_time_llm/metrics.py'),
+                                      'gen_time_llm.metrics.text_metrics': ('metrics.html#text_metrics', 'gen_time_llm/metrics.py')},
+            'gen_time_llm.models.gru': { 'gen_time_llm.models.gru.GRUGPTModel': ( 'models.gru.html#grugptmodel',
                                                                                   'gen_time_llm/models/gru.py'),
                                          'gen_time_llm.models.gru.GRUGPTModel.__init__': ( 'models.gru.html#grugptmodel.__init__',
                                                                                            'gen_time_llm/models/gru.py'),
+                                         'gen_time_llm.models.gru.GRUGPTModel._decoding_lm': ( 'models.gru.html#grugptmodel._decoding_lm',
+                                                                                               'gen_time_llm/models/gru.py'),
                                          'gen_time_llm.models.gru.GRUGPTModel.configure_optimizers': ( 'models.gru.html#grugptmodel.configure_optimizers',
                                                                                                        'gen_time_llm/models/gru.py'),
+                                         'gen_time_llm.models.gru.GRUGPTModel.decoder_logits': ( 'models.gru.html#grugptmodel.decoder_logits',
+                                                                                                 'gen_time_llm/models/gru.py'),
                                          'gen_time_llm.models.gru.GRUGPTModel.forward': ( 'models.gru.html#grugptmodel.forward',
                                                                                           'gen_time_llm/models/gru.py'),
                                          'gen_time_llm.models.gru.GRUGPTModel.generate': ( 'models.gru.html#grugptmodel.generate',
-                                                                                           'gen_time_llm/models/gru.py')},
-            'gen_time_llm.tsdataset': { 'gen_time_llm.tsdataset.LengthBasedBatchSampler': ( 'tsdataset.html#lengthbasedbatchsampler',
+                                                                                           'gen_time_llm/models/gru.py'),
+                                         'gen_time_llm.models.gru.GRUGPTModel.generate_summaries': ( 'models.gru.html#grugptmodel.generate_summaries',
+                                                                                                     'gen_time_llm/models/gru.py'),
+                                         'gen_time_llm.models.gru.GRUGPTModel.prefix_encoder': ( 'models.gru.html#grugptmodel.prefix_encoder',
+                                                                                                 'gen_time_llm/models/gru.py'),
+                                         'gen_time_llm.models.gru.GRUGPTModel.stream_generate': ( 'models.gru.html#grugptmodel.stream_generate',
+                                                                                                  'gen_time_llm/models/gru.py'),
+                                         'gen_time_llm.models.gru._SubsetLogits': ( 'models.gru.html#_subsetlogits',
+                                                                                    'gen_time_llm/models/gru.py'),
+                                         'gen_time_llm.models.gru._SubsetLogits.__init__': ( 'models.gru.html#_subsetlogits.__init__',
+                                                                                             'gen_time_llm/models/gru.py'),
+                                         'gen_time_llm.models.gru._SubsetLogits.forward': ( 'models.gru.html#_subsetlogits.forward',
+                                                                                            'gen_time_llm/models/gru.py')},
+            'gen_time_llm.models.timellm': { 'gen_time_llm.models.timellm.FlattenHead': ( 'models.timellm.html#flattenhead',
+                                                                                          'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.FlattenHead.__init__': ( 'models.timellm.html#flattenhead.__init__',
+                                                                                                   'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.FlattenHead.forward': ( 'models.timellm.html#flattenhead.forward',
+                                                                                                  'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PatchEmbedding': ( 'models.timellm.html#patchembedding',
+                                                                                             'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PatchEmbedding.__init__': ( 'models.timellm.html#patchembedding.__init__',
+                                                                                                      'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PatchEmbedding.forward': ( 'models.timellm.html#patchembedding.forward',
+                                                                                                     'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PromptCompiler': ( 'models.timellm.html#promptcompiler',
+                                                                                             'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PromptCompiler.__init__': ( 'models.timellm.html#promptcompiler.__init__',
+                                                                                                      'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PromptCompiler._record': ( 'models.timellm.html#promptcompiler._record',
+                                                                                                     'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PromptCompiler.compile': ( 'models.timellm.html#promptcompiler.compile',
+                                                                                                     'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PromptCompiler.count_tokens': ( 'models.timellm.html#promptcompiler.count_tokens',
+                                                                                                          'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PromptCompiler.feature_name': ( 'models.timellm.html#promptcompiler.feature_name',
+                                                                                                          'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PromptCompiler.feature_prompt': ( 'models.timellm.html#promptcompiler.feature_prompt',
+                                                                                                            'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PromptCompiler.format_number': ( 'models.timellm.html#promptcompiler.format_number',
+                                                                                                           'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PromptCompiler.header': ( 'models.timellm.html#promptcompiler.header',
+                                                                                                    'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PromptCompiler.mean_prompt_tokens': ( 'models.timellm.html#promptcompiler.mean_prompt_tokens',
+                                                                                                                'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.PromptCompiler.reset_stats': ( 'models.timellm.html#promptcompiler.reset_stats',
+                                                                                                         'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.ReplicationPad1d': ( 'models.timellm.html#replicationpad1d',
+                                                                                               'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.ReplicationPad1d.__init__': ( 'models.timellm.html#replicationpad1d.__init__',
+                                                                                                        'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.ReplicationPad1d.forward': ( 'models.timellm.html#replicationpad1d.forward',
+                                                                                                       'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.ReprogrammingLayer': ( 'models.timellm.html#reprogramminglayer',
+                                                                                                 'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.ReprogrammingLayer.__init__': ( 'models.timellm.html#reprogramminglayer.__init__',
+                                                                                                          'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.ReprogrammingLayer._prototypes': ( 'models.timellm.html#reprogramminglayer._prototypes',
+                                                                                                             'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.ReprogrammingLayer.build_index': ( 'models.timellm.html#reprogramminglayer.build_index',
+                                                                                                             'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.ReprogrammingLayer.forward': ( 'models.timellm.html#reprogramminglayer.forward',
+                                                                                                         'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.ReprogrammingLayer.reprogramming': ( 'models.timellm.html#reprogramminglayer.reprogramming',
+                                                                                                               'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.ReprogrammingLayer.reset_index': ( 'models.timellm.html#reprogramminglayer.reset_index',
+                                                                                                             'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.ReprogrammingLayer.select_prototypes': ( 'models.timellm.html#reprogramminglayer.select_prototypes',
+                                                                                                                   'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.ReprogrammingLayer.sparse_reprogramming': ( 'models.timellm.html#reprogramminglayer.sparse_reprogramming',
+                                                                                                                      'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.ReprogrammingLayer.train': ( 'models.timellm.html#reprogramminglayer.train',
+                                                                                                       'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TimeLLM': ( 'models.timellm.html#timellm',
+                                                                                      'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TimeLLM.__init__': ( 'models.timellm.html#timellm.__init__',
+                                                                                               'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TimeLLM._load_from_state_dict': ( 'models.timellm.html#timellm._load_from_state_dict',
+                                                                                                            'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TimeLLM.configure_optimizers': ( 'models.timellm.html#timellm.configure_optimizers',
+                                                                                                           'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TimeLLM.decoder_logits': ( 'models.timellm.html#timellm.decoder_logits',
+                                                                                                     'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TimeLLM.encode': ( 'models.timellm.html#timellm.encode',
+                                                                                             'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TimeLLM.forward': ( 'models.timellm.html#timellm.forward',
+                                                                                              'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TimeLLM.generate_summaries': ( 'models.timellm.html#timellm.generate_summaries',
+                                                                                                         'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TimeLLM.prefix_encoder': ( 'models.timellm.html#timellm.prefix_encoder',
+                                                                                                     'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TimeLLM.reference_summaries': ( 'models.timellm.html#timellm.reference_summaries',
+                                                                                                          'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TimeLLM.select_features': ( 'models.timellm.html#timellm.select_features',
+                                                                                                      'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TimeLLM.select_top_features_by_variance': ( 'models.timellm.html#timellm.select_top_features_by_variance',
+                                                                                                                      'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TimeLLM.source_embeddings': ( 'models.timellm.html#timellm.source_embeddings',
+                                                                                                        'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TokenEmbedding': ( 'models.timellm.html#tokenembedding',
+                                                                                             'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TokenEmbedding.__init__': ( 'models.timellm.html#tokenembedding.__init__',
+                                                                                                      'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm.TokenEmbedding.forward': ( 'models.timellm.html#tokenembedding.forward',
+                                                                                                     'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm._kmeans': ( 'models.timellm.html#_kmeans',
+                                                                                      'gen_time_llm/models/timellm.py'),
+                                             'gen_time_llm.models.timellm._rows_csr': ( 'models.timellm.html#_rows_csr',
+                                                                                        'gen_time_llm/models/timellm.py')},
+            'gen_time_llm.predict': { 'gen_time_llm.predict._ShardWriter': ('predict.html#_shardwriter', 'gen_time_llm/predict.py'),
+                                      'gen_time_llm.predict._ShardWriter.__init__': ( 'predict.html#_shardwriter.__init__',
+                                                                                      'gen_time_llm/predict.py'),
+                                      'gen_time_llm.predict._ShardWriter.flush': ( 'predict.html#_shardwriter.flush',
+                                                                                   'gen_time_llm/predict.py'),
+                                      'gen_time_llm.predict._ShardWriter.on_predict_end': ( 'predict.html#_shardwriter.on_predict_end',
+                                                                                            'gen_time_llm/predict.py'),
+                                      'gen_time_llm.predict._ShardWriter.on_predict_start': ( 'predict.html#_shardwriter.on_predict_start',
+                                                                                              'gen_time_llm/predict.py'),
+                                      'gen_time_llm.predict._ShardWriter.write_on_batch_end': ( 'predict.html#_shardwriter.write_on_batch_end',
+                                                                                                'gen_time_llm/predict.py'),
+                                      'gen_time_llm.predict._predict_shards': ('predict.html#_predict_shards', 'gen_time_llm/predict.py'),
+                                      'gen_time_llm.predict._read_progress': ('predict.html#_read_progress', 'gen_time_llm/predict.py'),
+                                      'gen_time_llm.predict._summary_tokenizer': ( 'predict.html#_summary_tokenizer',
+                                                                                   'gen_time_llm/predict.py'),
+                                      'gen_time_llm.predict._write_progress': ('predict.html#_write_progress', 'gen_time_llm/predict.py'),
+                                      'gen_time_llm.predict.main': ('predict.html#main', 'gen_time_llm/predict.py'),
+                                      'gen_time_llm.predict.predict': ('predict.html#predict', 'gen_time_llm/predict.py'),
+                                      'gen_time_llm.predict.predict_shard': ('predict.html#predict_shard', 'gen_time_llm/predict.py')},
+            'gen_time_llm.profiling': { 'gen_time_llm.profiling.ActivationMeter': ( 'profiling.html#activationmeter',
+                                                                                    'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.ActivationMeter.__enter__': ( 'profiling.html#activationmeter.__enter__',
+                                                                                              'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.ActivationMeter.__exit__': ( 'profiling.html#activationmeter.__exit__',
+                                                                                             'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.ActivationMeter.__init__': ( 'profiling.html#activationmeter.__init__',
+                                                                                             'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.ActivationMeter._pack': ( 'profiling.html#activationmeter._pack',
+                                                                                          'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback': ( 'profiling.html#stagetimingcallback',
+                                                                                        'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback.__init__': ( 'profiling.html#stagetimingcallback.__init__',
+                                                                                                 'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback._batch_end': ( 'profiling.html#stagetimingcallback._batch_end',
+                                                                                                   'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback._batch_start': ( 'profiling.html#stagetimingcallback._batch_start',
+                                                                                                     'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback._log': ( 'profiling.html#stagetimingcallback._log',
+                                                                                             'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback.on_after_backward': ( 'profiling.html#stagetimingcallback.on_after_backward',
+                                                                                                          'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback.on_before_backward': ( 'profiling.html#stagetimingcallback.on_before_backward',
+                                                                                                           'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback.on_fit_end': ( 'profiling.html#stagetimingcallback.on_fit_end',
+                                                                                                   'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback.on_fit_start': ( 'profiling.html#stagetimingcallback.on_fit_start',
+                                                                                                     'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback.on_train_batch_end': ( 'profiling.html#stagetimingcallback.on_train_batch_end',
+                                                                                                           'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback.on_train_batch_start': ( 'profiling.html#stagetimingcallback.on_train_batch_start',
+                                                                                                             'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback.on_train_epoch_end': ( 'profiling.html#stagetimingcallback.on_train_epoch_end',
+                                                                                                           'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback.on_validation_batch_end': ( 'profiling.html#stagetimingcallback.on_validation_batch_end',
+                                                                                                                'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback.on_validation_batch_start': ( 'profiling.html#stagetimingcallback.on_validation_batch_start',
+                                                                                                                  'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.StageTimingCallback.on_validation_epoch_end': ( 'profiling.html#stagetimingcallback.on_validation_epoch_end',
+                                                                                                                'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.TelemetryCallback': ( 'profiling.html#telemetrycallback',
+                                                                                      'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.TelemetryCallback.__init__': ( 'profiling.html#telemetrycallback.__init__',
+                                                                                               'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.TelemetryCallback._batch_end': ( 'profiling.html#telemetrycallback._batch_end',
+                                                                                                 'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.TelemetryCallback._batch_start': ( 'profiling.html#telemetrycallback._batch_start',
+                                                                                                   'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.TelemetryCallback._summarize': ( 'profiling.html#telemetrycallback._summarize',
+                                                                                                 'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.TelemetryCallback.on_fit_end': ( 'profiling.html#telemetrycallback.on_fit_end',
+                                                                                                 'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.TelemetryCallback.on_fit_start': ( 'profiling.html#telemetrycallback.on_fit_start',
+                                                                                                   'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.TelemetryCallback.on_train_batch_end': ( 'profiling.html#telemetrycallback.on_train_batch_end',
+                                                                                                         'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.TelemetryCallback.on_train_batch_start': ( 'profiling.html#telemetrycallback.on_train_batch_start',
+                                                                                                           'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.TelemetryCallback.on_train_epoch_end': ( 'profiling.html#telemetrycallback.on_train_epoch_end',
+                                                                                                         'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.TelemetryCallback.on_validation_batch_end': ( 'profiling.html#telemetrycallback.on_validation_batch_end',
+                                                                                                              'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.TelemetryCallback.on_validation_batch_start': ( 'profiling.html#telemetrycallback.on_validation_batch_start',
+                                                                                                                'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.TelemetryCallback.on_validation_epoch_end': ( 'profiling.html#telemetrycallback.on_validation_epoch_end',
+                                                                                                              'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.resident_memory_mb': ( 'profiling.html#resident_memory_mb',
+                                                                                       'gen_time_llm/profiling.py'),
+                                        'gen_time_llm.profiling.training_step_report': ( 'profiling.html#training_step_report',
+                                                                                         'gen_time_llm/profiling.py')},
+            'gen_time_llm.tsdataset': { 'gen_time_llm.tsdataset.FeatureStatsIndex': ( 'tsdataset.html#featurestatsindex',
+                                                                                      'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.__contains__': ( 'tsdataset.html#featurestatsindex.__contains__',
+                                                                                                   'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.__init__': ( 'tsdataset.html#featurestatsindex.__init__',
+                                                                                               'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.__len__': ( 'tsdataset.html#featurestatsindex.__len__',
+                                                                                              'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.__repr__': ( 'tsdataset.html#featurestatsindex.__repr__',
+                                                                                               'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.count': ( 'tsdataset.html#featurestatsindex.count',
+                                                                                            'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.from_jsonl': ( 'tsdataset.html#featurestatsindex.from_jsonl',
+                                                                                                 'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.from_records': ( 'tsdataset.html#featurestatsindex.from_records',
+                                                                                                   'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.load': ( 'tsdataset.html#featurestatsindex.load',
+                                                                                           'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.max': ( 'tsdataset.html#featurestatsindex.max',
+                                                                                          'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.mean': ( 'tsdataset.html#featurestatsindex.mean',
+                                                                                           'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.min': ( 'tsdataset.html#featurestatsindex.min',
+                                                                                          'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.save': ( 'tsdataset.html#featurestatsindex.save',
+                                                                                           'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.std': ( 'tsdataset.html#featurestatsindex.std',
+                                                                                          'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.top_k': ( 'tsdataset.html#featurestatsindex.top_k',
+                                                                                            'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.update': ( 'tsdataset.html#featurestatsindex.update',
+                                                                                             'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.FeatureStatsIndex.variance': ( 'tsdataset.html#featurestatsindex.variance',
+                                                                                               'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.LengthBasedBatchSampler': ( 'tsdataset.html#lengthbasedbatchsampler',
                                                                                             'gen_time_llm/tsdataset.py'),
                                         'gen_time_llm.tsdataset.LengthBasedBatchSampler.__init__': ( 'tsdataset.html#lengthbasedbatchsampler.__init__',
                                                                                                      'gen_time_llm/tsdataset.py'),
@@ -23,16 +323,8 @@ d = { 'settings': { 'branch': 'main',
                                                                                                      'gen_time_llm/tsdataset.py'),
                                         'gen_time_llm.tsdataset.LengthBasedBatchSampler.__len__': ( 'tsdataset.html#lengthbasedbatchsampler.__len__',
                                                                                                     'gen_time_llm/tsdataset.py'),
-                                        'gen_time_llm.tsdataset.TimeSeriesDataModule': ( 'tsdataset.html#timeseriesdatamodule',
-                                                                                         'gen_time_llm/tsdataset.py'),
-                                        'gen_time_llm.tsdataset.TimeSeriesDataModule.__init__': ( 'tsdataset.html#timeseriesdatamodule.__init__',
-                                                                                                  'gen_time_llm/tsdataset.py'),
-                                        'gen_time_llm.tsdataset.TimeSeriesDataModule.test_dataloader': ( 'tsdataset.html#timeseriesdatamodule.test_dataloader',
-                                                                                                         'gen_time_llm/tsdataset.py'),
-                                        'gen_time_llm.tsdataset.TimeSeriesDataModule.train_dataloader': ( 'tsdataset.html#timeseriesdatamodule.train_dataloader',
+                                        'gen_time_llm.tsdataset.LengthBasedBatchSampler.padding_stats': ( 'tsdataset.html#lengthbasedbatchsampler.padding_stats',
                                                                                                           'gen_time_llm/tsdataset.py'),
-                                        'gen_time_llm.tsdataset.TimeSeriesDataModule.val_dataloader': ( 'tsdataset.html#timeseriesdatamodule.val_dataloader',
-                                                                                                        'gen_time_llm/tsdataset.py'),
                                         'gen_time_llm.tsdataset.TimeSeriesDataset': ( 'tsdataset.html#timeseriesdataset',
                                                                                       'gen_time_llm/tsdataset.py'),
                                         'gen_time_llm.tsdataset.TimeSeriesDataset.__eq__': ( 'tsdataset.html#timeseriesdataset.__eq__',
@@ -45,6 +337,8 @@ d = { 'settings': { 'branch': 'main',
                                                                                               'gen_time_llm/tsdataset.py'),
                                         'gen_time_llm.tsdataset.TimeSeriesDataset.__repr__': ( 'tsdataset.html#timeseriesdataset.__repr__',
                                                                                                'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.TimeSeriesDataset._get_item': ( 'tsdataset.html#timeseriesdataset._get_item',
+                                                                                                'gen_time_llm/tsdataset.py'),
                                         'gen_time_llm.tsdataset.TimeSeriesDataset.clean_text': ( 'tsdataset.html#timeseriesdataset.clean_text',
                                                                                                  'gen_time_llm/tsdataset.py'),
                                         'gen_time_llm.tsdataset.TimeSeriesDataset.from_jsonl': ( 'tsdataset.html#timeseriesdataset.from_jsonl',
@@ -53,6 +347,50 @@ d = { 'settings': { 'branch': 'main',
                                                                                      'gen_time_llm/tsdataset.py'),
                                         'gen_time_llm.tsdataset.TimeSeriesLoader.__init__': ( 'tsdataset.html#timeseriesloader.__init__',
                                                                                               'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.TimeSeriesLoader._collate': ( 'tsdataset.html#timeseriesloader._collate',
+                                                                                              'gen_time_llm/tsdataset.py'),
                                         'gen_time_llm.tsdataset.TimeSeriesLoader._collate_fn': ( 'tsdataset.html#timeseriesloader._collate_fn',
-                                                                                                 'gen_time_llm/tsdataset.py')},
+                                                                                                 'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.VocabSubset': ('tsdataset.html#vocabsubset', 'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.VocabSubset.__init__': ( 'tsdataset.html#vocabsubset.__init__',
+                                                                                         'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.VocabSubset.__len__': ( 'tsdataset.html#vocabsubset.__len__',
+                                                                                        'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.VocabSubset.__repr__': ( 'tsdataset.html#vocabsubset.__repr__',
+                                                                                         'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.VocabSubset.coverage': ( 'tsdataset.html#vocabsubset.coverage',
+                                                                                         'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.VocabSubset.from_jsonl': ( 'tsdataset.html#vocabsubset.from_jsonl',
+                                                                                           'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.VocabSubset.from_records': ( 'tsdataset.html#vocabsubset.from_records',
+                                                                                             'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.VocabSubset.from_texts': ( 'tsdataset.html#vocabsubset.from_texts',
+                                                                                           'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.VocabSubset.load': ( 'tsdataset.html#vocabsubset.load',
+                                                                                     'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.VocabSubset.save': ( 'tsdataset.html#vocabsubset.save',
+                                                                                     'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.VocabSubset.slice_lm_head': ( 'tsdataset.html#vocabsubset.slice_lm_head',
+                                                                                              'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.VocabSubset.to_subset': ( 'tsdataset.html#vocabsubset.to_subset',
+                                                                                          'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.VocabSubset.to_vocab': ( 'tsdataset.html#vocabsubset.to_vocab',
+                                                                                         'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.__getattr__': ('tsdataset.html#__getattr__', 'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.batch_stats_enabled': ( 'tsdataset.html#batch_stats_enabled',
+                                                                                        'gen_time_llm/tsdataset.py'),
+                                        'gen_time_llm.tsdataset.enable_batch_stats': ( 'tsdataset.html#enable_batch_stats',
+                                                                                       'gen_time_llm/tsdataset.py')},
+            'gen_time_llm.tune': { 'gen_time_llm.tune.ValLossPruningCallback': ('tune.html#vallosspruningcallback', 'gen_time_llm/tune.py'),
+                                   'gen_time_llm.tune.ValLossPruningCallback.__init__': ( 'tune.html#vallosspruningcallback.__init__',
+                                                                                          'gen_time_llm/tune.py'),
+                                   'gen_time_llm.tune.ValLossPruningCallback.on_validation_end': ( 'tune.html#vallosspruningcallback.on_validation_end',
+                                                                                                   'gen_time_llm/tune.py'),
+                                   'gen_time_llm.tune._objective': ('tune.html#_objective', 'gen_time_llm/tune.py'),
+                                   'gen_time_llm.tune._run_worker': ('tune.html#_run_worker', 'gen_time_llm/tune.py'),
+                                   'gen_time_llm.tune.gru_search_space': ('tune.html#gru_search_space', 'gen_time_llm/tune.py'),
+                                   'gen_time_llm.tune.make_pruner': ('tune.html#make_pruner', 'gen_time_llm/tune.py'),
+                                   'gen_time_llm.tune.make_storage': ('tune.html#make_storage', 'gen_time_llm/tune.py'),
+                                   'gen_time_llm.tune.timellm_search_space': ('tune.html#timellm_search_space', 'gen_time_llm/tune.py'),
+                                   'gen_time_llm.tune.tune': ('tune.html#tune', 'gen_time_llm/tune.py')},
             'gen_time_llm.utils': {'gen_time_llm.utils.generate_fake_data': ('utils.html#generate_fake_data', 'gen_time_llm/utils.py')}}}
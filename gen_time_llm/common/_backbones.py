@@ -0,0 +1,172 @@
+"""Process-wide registry of the frozen pretrained LLMs"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/common.backbones.ipynb.
+
+# %% auto 0
+__all__ = ['load_frozen_backbone', 'loaded_backbones', 'clear_backbones', 'backbone_name', 'module_fingerprint',
+           'activation_checkpointing', 'chunked_lm_loss']
+
+# %% ../../nbs/common.backbones.ipynb 4
+import hashlib
+import threading
+import weakref
+from contextlib import contextmanager
+
+import math
+
+import torch
+import torch.nn as nn
+import torch.nn.functional as F
+from torch.utils.checkpoint import checkpoint
+
+# %% ../../nbs/common.backbones.ipynb 6
+_BACKBONES = {}
+_BACKBONES_LOCK = threading.Lock()
+
+def load_frozen_backbone(name_or_path, dtype=torch.float32):
+    """
+    Load a pretrained causal LM once per process and share it.
+
+    **Parameters:**<br>
+    `name_or_path`: str, HuggingFace model name or local path.<br>
+    `dtype`: torch.dtype, dtype of the weights.<br>
+
+    **Returns:**<br>
+    `backbone`: PreTrainedModel, frozen causal LM in evaluation mode, shared by all callers.<br>
+    """
+    key = (str(name_or_path), dtype)
+    with _BACKBONES_LOCK:
+        if key not in _BACKBONES:
+            from transformers import AutoModelForCausalLM
+
+            backbone = AutoModelForCausalLM.from_pretrained(
+                name_or_path,
+                dtype=dtype,
+                low_cpu_mem_usage=True,
+            )
+            backbone.requires_grad_(False)
+            _BACKBONES[key] = backbone.eval()
+        return _BACKBONES[key]
+
+def loaded_backbones():
+    """Keys `(name_or_path, dtype)` of the backbones loaded in this process."""
+    return list(_BACKBONES)
+
+def clear_backbones():
+    """Drop the references held by the registry, e.g. between sweeps."""
+    with _BACKBONES_LOCK:
+        _BACKBONES.clear()
+
+def backbone_name(module):
+    """`name_or_path` of the registered backbone that `module` is part of, None if there is none."""
+    with _BACKBONES_LOCK:
+        backbones = list(_BACKBONES.items())
+    for (name_or_path, _), backbone in backbones:
+        if any(m is module for m in backbone.modules()):
+            return name_or_path
+    return None
+
+_FINGERPRINTS = weakref.WeakKeyDictionary()
+
+def module_fingerprint(module):
+    """
+    SHA-256 of the state dict of a frozen module (names, dtypes, shapes and bytes of the tensors).
+    The weights are frozen, so it is computed once per module.
+    """
+    if module not in _FINGERPRINTS:
+        digest = hashlib.sha256()
+        for key, tensor in sorted(module.state_dict().items()):
+            if not torch.is_tensor(tensor):
+                continue
+            tensor = tensor.detach().cpu().contiguous().reshape(-1)
+            digest.update(f'{key}:{tensor.dtype}:{tuple(tensor.shape)}'.encode())
+            digest.update(tensor.view(torch.uint8).numpy())
+        _FINGERPRINTS[module] = digest.hexdigest()
+    return _FINGERPRINTS[module]
+
+# %% ../../nbs/common.backbones.ipynb 8
+_CHECKPOINTING = threading.local()
+_WRAPPED_BLOCKS = {}
+_WRAPPED_BLOCKS_LOCK = threading.Lock()
+
+def _backbone_blocks(backbone):
+    # The transformer blocks are the longest ModuleList of the model (`h` in GPT-2, `layers` in LLaMA)
+    blocks = [module for module in backbone.modules() if isinstance(module, nn.ModuleList)]
+    assert blocks, f'{type(backbone).__name__} has no ModuleList of blocks to checkpoint'
+    return max(blocks, key=len)
+
+def _checkpointed_forward(block):
+    forward = type(block).forward
+    def wrapper(*args, **kwargs):
+        if getattr(_CHECKPOINTING, 'enabled', False) and torch.is_grad_enabled():
+            return checkpoint(forward, block, *args, use_reentrant=False, **kwargs)
+        return forward(block, *args, **kwargs)
+    return wrapper
+
+@contextmanager
+def activation_checkpointing(backbone, enabled=True):
+    """
+    Recompute the activations of the blocks of `backbone` in the backward pass instead of keeping
+    them, for the forward passes of the current thread run within the context. The backbone must be
+    called with `use_cache=False`.
+    """
+    if not enabled:
+        yield
+        return
+    blocks = list(_backbone_blocks(backbone))
+    # The blocks are wrapped by the first open context and restored by the last one
+    with _WRAPPED_BLOCKS_LOCK:
+        for block in blocks:
+            if block not in _WRAPPED_BLOCKS:
+                block.forward = _checkpointed_forward(block)
+            _WRAPPED_BLOCKS[block] = _WRAPPED_BLOCKS.get(block, 0) + 1
+    previous = getattr(_CHECKPOINTING, 'enabled', False)
+    _CHECKPOINTING.enabled = True
+    try:
+        yield
+    finally:
+        _CHECKPOINTING.enabled = previous
+        with _WRAPPED_BLOCKS_LOCK:
+            for block in blocks:
+                _WRAPPED_BLOCKS[block] -= 1
+                if not _WRAPPED_BLOCKS[block]:
+                    del _WRAPPED_BLOCKS[block]
+                    del block.forward
+
+# %% ../../nbs/common.backbones.ipynb 10
+def chunked_lm_loss(backbone, hidden_states, target, ignore_index=-100, chunk_size=128):
+    """
+    Mean cross-entropy of the LM head of `backbone` over the non-ignored target tokens, without
+    materializing the logits of the whole sequence.
+
+    **Parameters:**<br>
+    `backbone`: PreTrainedModel, causal LM whose output embeddings score the hidden states, or the LM head module itself (e.g. `VocabSubset.slice_lm_head`).<br>
+    `hidden_states`: tensor, last hidden states [B,L,D] of the backbone, aligned with the target.<br>
+    `target`: tensor, target token ids [B,T]. Positions beyond `L` are scored with zero logits (a uniform distribution) and hidden states beyond `T` are ignored.<br>
+    `ignore_index`: int, target id excluded from the loss.<br>
+    `chunk_size`: int, positions whose logits are materialized at once.<br>
+
+    **Returns:**<br>
+    `loss`: tensor, scalar mean cross-entropy.<br>
+    """
+    lm_head = backbone.get_output_embeddings() if hasattr(backbone, 'get_output_embeddings') else backbone
+
+    def chunk_loss(hidden, chunk_target):
+        logits = lm_head(hidden).float()
+        return F.cross_entropy(logits.flatten(0, 1), chunk_target.flatten(), ignore_index=ignore_index, reduction='sum')
+
+    T = target.size(1)
+    L = min(hidden_states.size(1), T)
+    total = hidden_states.new_zeros((), dtype=torch.float32)
+    for start in range(0, L, chunk_size):
+        end = min(start + chunk_size, L)
+        args = (hidden_states[:, start:end], target[:, start:end])
+        if torch.is_grad_enabled():
+            total = total + checkpoint(chunk_loss, *args, use_reentrant=False)
+        else:
+            total = total + chunk_loss(*args)
+
+    # Zero logits beyond the hidden states: each target token costs log(vocab)
+    n_padded = (target[:, L:] != ignore_index).sum()
+    total = total + n_padded * math.log(lm_head.weight.size(0))
+    return total / (target != ignore_index).sum()
@@ -11,6 +11,11 @@ import torch.nn as nn
 import pytorch_lightning as pl
 from pytorch_lightning.callbacks.early_stopping import EarlyStopping
 
+from ..metrics import text_metrics
+from ._backbones import backbone_name, module_fingerprint
+from ._timing import stage
+from ..profiling import StageTimingCallback, TelemetryCallback
+
 # %% ../../nbs/common.base_model.ipynb 3
 class BaseModel(pl.LightningModule):
     """
@@ -19,6 +24,13 @@ class BaseModel(pl.LightningModule):
     This base class is designed for models that take time series data as input and generate textual summaries.
     """
 
+    # Attribute names of the frozen (pretrained) LLM modules of the model
+    frozen_modules = ()
+
+    # Attribute names of the modules rebuilt from the pretrained LLM when the model is created, slim
+    # checkpoints reference them (backbone name and weights hash) instead of storing their weights
+    pretrained_modules = ()
+
     def __init__(
         self,
         random_seed,
@@ -32,6 +44,11 @@ class BaseModel(pl.LightningModule):
         early_stop_patience_steps=1000,  # Patience for early stopping
         output_key="summary_input_ids",  # Fixed output key for summary
         input_keys=None,  # Keys to extract from the batch (dynamically chosen by the model)
+        val_generate_every_n_epochs=0,  # Generate summaries and log text metrics every n validation epochs (0 disables)
+        val_generate_batches=1,  # Number of validation batches used for generation
+        stage_timing=False,  # Log the time of the stages of the steps (a path also writes their Chrome trace)
+        telemetry=False,  # Log the padding and memory of the batches per epoch (a path also writes their JSON summary)
+        slim_checkpoints=True,  # Leave the weights of the `pretrained_modules` out of the checkpoints
         **trainer_kwargs,
     ):
         super().__init__()
@@ -57,6 +74,13 @@ class BaseModel(pl.LightningModule):
         self.output_key = output_key  # Summary key (fixed)
         self.input_keys = input_keys if input_keys is not None else []  # Dynamic input keys
 
+        # Sampled generation during validation
+        self.val_generate_every_n_epochs = val_generate_every_n_epochs
+        self.val_generate_batches = val_generate_batches
+
+        # Checkpoints
+        self.slim_checkpoints = slim_checkpoints
+
         # Trainer configuration
         self.max_steps = max_steps
         self.early_stop_patience_steps = early_stop_patience_steps
@@ -70,6 +94,18 @@ class BaseModel(pl.LightningModule):
                 EarlyStopping(monitor="val_loss", patience=early_stop_patience_steps)
             )
 
+        # Add stage timing
+        if stage_timing:
+            trainer_kwargs.setdefault("callbacks", []).append(
+                StageTimingCallback(trace_path=None if stage_timing is True else stage_timing)
+            )
+
+        # Add padding and memory telemetry
+        if telemetry:
+            trainer_kwargs.setdefault("callbacks", []).append(
+                TelemetryCallback(summary_path=None if telemetry is True else telemetry)
+            )
+
     def forward(self, batch):
         """
         Forward pass of the model.
@@ -97,19 +133,57 @@ class BaseModel(pl.LightningModule):
 
     def validation_step(self, batch, batch_idx):
         """
-        Validation step: compute validation loss for a single batch in the text generation task.
+        Validation step: compute the teacher forced validation loss and perplexity of a single batch.
+        Every `val_generate_every_n_epochs` epochs, the first `val_generate_batches` batches are also
+        decoded and scored against the reference summaries.
         """
         # Extract the target (i.e., ground-truth sequence) from the batch
         target = batch[self.output_key]  # Assuming self.output_key points to the correct target field
+        batch_size = target.size(0)
 
-        # Autoregressive generation (always)
-        loss = self.forward(batch, target, teacher_forcing=False)
+        # Teacher forcing: a single forward pass, comparable across epochs for early stopping
+        loss = self.forward(batch, target, teacher_forcing=True)
 
-        # Log the validation loss for monitoring
-        self.log("val_loss", loss, prog_bar=True)
+        # Log the validation loss and perplexity for monitoring
+        self.log("val_loss", loss, prog_bar=True, batch_size=batch_size)
+        self.log("val_perplexity", torch.exp(loss), batch_size=batch_size)
+
+        if self._generate_in_validation(batch_idx):
+            with stage('generate'):
+                predictions = self.generate_summaries(batch)
+            references = self.reference_summaries(batch)
+            for name, value in text_metrics(predictions, references).items():
+                self.log(f"val_{name}", value, batch_size=batch_size)
 
         return loss
 
+    def _generate_in_validation(self, batch_idx):
+        if self.val_generate_every_n_epochs <= 0 or batch_idx >= self.val_generate_batches:
+            return False
+        if self.trainer.sanity_checking:
+            return False
+        return (self.current_epoch + 1) % self.val_generate_every_n_epochs == 0
+
+    def generate_summaries(self, batch, max_length=None):
+        """
+        Generate the summaries of a batch as a list of strings, used for the validation text metrics.
+        They are bounded by `max_length` tokens, by default the length of the reference summaries.
+        """
+        raise NotImplementedError("Subclasses must implement generate_summaries to log validation text metrics.")
+
+    def predict_step(self, batch, batch_idx, dataloader_idx=0):
+        """
+        Generate the summaries of a prediction batch, up to the `max_length` of the model: the records
+        need no reference summary.
+        """
+        return self.generate_summaries(batch, max_length=self.max_length)
+
+    def reference_summaries(self, batch):
+        """
+        Decode the reference summaries of a batch.
+        """
+        return self.tokenizer.batch_decode(batch[self.output_key], skip_special_tokens=True)
+
 
     def configure_optimizers(self):
         """
@@ -124,6 +198,58 @@ class BaseModel(pl.LightningModule):
         }
         return {"optimizer": optimizer, "lr_scheduler": lr_scheduler}
 
+    def train(self, mode=True):
+        """
+        Set the training mode, the frozen LLM modules always stay in evaluation mode.
+        """
+        super().train(mode)
+        for name in self.frozen_modules:
+            getattr(self, name).eval()
+        return self
+
+    def _outer_pretrained_modules(self):
+        # Pretrained modules that are not part of another one (e.g. `llm` inside `llm_head`)
+        modules = {name: getattr(self, name) for name in self.pretrained_modules if getattr(self, name) is not None}
+        return {
+            name: module for name, module in modules.items()
+            if not any(other is not module and any(m is module for m in other.modules()) for other in modules.values())
+        }
+
+    def on_save_checkpoint(self, checkpoint):
+        """
+        Record the class of the model in the checkpoint, so `gen_time_llm.evaluation.load_model` can load it.
+        With `slim_checkpoints`, the weights of the pretrained modules are replaced by their reference.
+        """
+        checkpoint["model_class"] = f"{type(self).__module__}.{type(self).__qualname__}"
+        if not self.slim_checkpoints or not self.pretrained_modules:
+            return
+        checkpoint["pretrained_modules"] = {
+            name: dict(backbone=backbone_name(module), sha256=module_fingerprint(module))
+            for name, module in self._outer_pretrained_modules().items()
+        }
+        prefixes = tuple(f"{name}." for name in self.pretrained_modules)
+        checkpoint["state_dict"] = {key: value for key, value in checkpoint["state_dict"].items()
+                                    if not key.startswith(prefixes)}
+
+    def on_load_checkpoint(self, checkpoint):
+        """
+        Put the weights of the pretrained modules back into a slim checkpoint, from the modules the
+        model was created with, after checking that they hold the weights the checkpoint references.
+        """
+        references = checkpoint.get("pretrained_modules")
+        if not references:
+            return
+        modules = self._outer_pretrained_modules()
+        for name, reference in references.items():
+            if name not in modules or module_fingerprint(modules[name]) != reference["sha256"]:
+                raise ValueError(f"The weights of `{name}` differ from the ones referenced by the checkpoint "
+                                 f"(backbone {reference['backbone']}).")
+        prefixes = tuple(f"{name}." for name in self.pretrained_modules)
+        state_dict = checkpoint["state_dict"]
+        for key, value in self.state_dict().items():
+            if key.startswith(prefixes):
+                state_dict.setdefault(key, value)
+
     def __repr__(self):
         return type(self).__name__
 
@@ -2,12 +2,13 @@
 
 # %% auto 0
 __all__ = ['ACTIVATIONS', 'MLP', 'Chomp1d', 'CausalConv1d', 'TemporalConvolutionEncoder', 'TransEncoderLayer', 'TransEncoder',
-           'TransDecoderLayer', 'TransDecoder', 'AttentionLayer', 'PositionalEmbedding', 'TokenEmbedding',
-           'TimeFeatureEmbedding', 'FixedEmbedding', 'TemporalEmbedding', 'DataEmbedding', 'MovingAvg', 'SeriesDecomp',
-           'RevIN']
+           'TransDecoderLayer', 'TransDecoder', 'ScaledDotProductAttention', 'AttentionLayer', 'sinusoidal_table',
+           'PositionalEmbedding', 'TokenEmbedding', 'TimeFeatureEmbedding', 'FixedEmbedding', 'TemporalEmbedding',
+           'DataEmbedding', 'MovingAvg', 'SeriesDecomp', 'RevIN']
 
 # %% ../../nbs/common.modules.ipynb 3
 import math
+import threading
 
 import torch
 import torch.nn as nn
@@ -98,6 +99,9 @@ class CausalConv1d(nn.Module):
     
     **Returns:**<br>
     `x`: tensor, torch tensor of dim [N,C_out,T] activation(conv1d(inputs, kernel) + bias). <br>
+
+    `step` computes the output of one new time step from a ring buffer of the last
+    (kernel_size-1)*dilation+1 inputs, without running the convolution over the history.
     """
     def __init__(self, in_channels, out_channels, kernel_size,
                  padding, dilation, activation, stride:int=1):
@@ -115,6 +119,35 @@ class CausalConv1d(nn.Module):
     def forward(self, x):
         return self.causalconv(x)
 
+    def init_state(self, x):
+        """
+        Streaming state of the history `x` of dim [N,C_in,T] (T may be 0): the ring buffer of the
+        last receptive field inputs, zero padded to the left like `forward`.
+        """
+        assert self.conv.stride[0] == 1, 'Streaming requires stride=1'
+        size = self.chomp.horizon + 1
+        buffer = F.pad(x.detach(), (max(size - x.size(2), 0), 0))[:, :, -size:].clone()
+        # `position` is the next slot to write, i.e. the oldest input of the buffer
+        return dict(buffer=buffer, position=0)
+
+    def step(self, x_t, state):
+        """
+        Append `x_t` of dim [N,C_in,1] and return the output of the new time step of dim [N,C_out,1].
+        The state is updated in place.
+        """
+        buffer, position = state['buffer'], state['position']
+        size = buffer.size(2)
+        buffer[:, :, position] = x_t[:, :, 0]
+        dilation = self.conv.dilation[0]
+        kernel_size = self.conv.kernel_size[0]
+        taps = [(position - dilation * (kernel_size - 1 - j)) % size for j in range(kernel_size)]
+        x_taps = buffer[:, :, taps]
+        y = torch.einsum('nck,ock->no', x_taps, self.conv.weight)
+        if self.conv.bias is not None:
+            y = y + self.conv.bias
+        state['position'] = (position + 1) % size
+        return self.activation(y.unsqueeze(-1)), state
+
 # %% ../../nbs/common.modules.ipynb 11
 class TemporalConvolutionEncoder(nn.Module):
     """ Temporal Convolution Encoder
@@ -155,7 +188,32 @@ class TemporalConvolutionEncoder(nn.Module):
         x = x.permute(0, 2, 1).contiguous()
         return x
 
-# %% ../../nbs/common.modules.ipynb 15
+    @torch.no_grad()
+    def init_state(self, x):
+        """
+        Per-layer streaming states of the history `x` of dim [N,T,C_in] (T may be 0), computed
+        with a single full pass.
+        """
+        x = x.permute(0, 2, 1)
+        states = []
+        for layer in self.tcn:
+            states.append(layer.init_state(x))
+            x = layer(x) if x.size(2) > 0 else x.new_zeros(x.size(0), layer.conv.out_channels, 0)
+        return states
+
+    @torch.no_grad()
+    def step(self, x_t, states):
+        """
+        Incremental inference: append `x_t` of dim [N,1,C_in] and return the encoding of the new
+        time step of dim [N,1,C_out], in O(layers) instead of O(T x layers).
+        The `states` from `init_state` are updated in place.
+        """
+        x_t = x_t.permute(0, 2, 1)
+        for layer, state in zip(self.tcn, states):
+            x_t, _ = layer.step(x_t, state)
+        return x_t.permute(0, 2, 1), states
+
+# %% ../../nbs/common.modules.ipynb 16
 class TransEncoderLayer(nn.Module):
     def __init__(self, attention, hidden_size, conv_hidden_size=None, dropout=0.1, activation="relu"):
         super(TransEncoderLayer, self).__init__()
@@ -168,10 +226,12 @@ class TransEncoderLayer(nn.Module):
         self.dropout = nn.Dropout(dropout)
         self.activation = F.relu if activation == "relu" else F.gelu
 
-    def forward(self, x, attn_mask=None):
+    def forward(self, x, attn_mask=None, key_padding_mask=None):
+        padding = {} if key_padding_mask is None else dict(key_padding_mask=key_padding_mask)
         new_x, attn = self.attention(
             x, x, x,
-            attn_mask=attn_mask
+            attn_mask=attn_mask,
+            **padding
         )
         
         x = x + self.dropout(new_x)
@@ -190,27 +250,31 @@ class TransEncoder(nn.Module):
         self.conv_layers = nn.ModuleList(conv_layers) if conv_layers is not None else None
         self.norm = norm_layer
 
-    def forward(self, x, attn_mask=None):
+    def forward(self, x, attn_mask=None, key_padding_mask=None):
         # x [B, L, D]
+        # Attention maps are only collected from the layers that return them
         attns = []
         if self.conv_layers is not None:
             for attn_layer, conv_layer in zip(self.attn_layers, self.conv_layers):
-                x, attn = attn_layer(x, attn_mask=attn_mask)
+                x, attn = attn_layer(x, attn_mask=attn_mask, key_padding_mask=key_padding_mask)
                 x = conv_layer(x)
-                attns.append(attn)
+                if attn is not None:
+                    attns.append(attn)
             x, attn = self.attn_layers[-1](x)
-            attns.append(attn)
+            if attn is not None:
+                attns.append(attn)
         else:
             for attn_layer in self.attn_layers:
-                x, attn = attn_layer(x, attn_mask=attn_mask)
-                attns.append(attn)
+                x, attn = attn_layer(x, attn_mask=attn_mask, key_padding_mask=key_padding_mask)
+                if attn is not None:
+                    attns.append(attn)
 
         if self.norm is not None:
             x = self.norm(x)
 
         return x, attns
 
-# %% ../../nbs/common.modules.ipynb 16
+# %% ../../nbs/common.modules.ipynb 17
 class TransDecoderLayer(nn.Module):
     def __init__(self, self_attention, cross_attention, hidden_size, conv_hidden_size=None,
                  dropout=0.1, activation="relu"):
@@ -226,22 +290,35 @@ class TransDecoderLayer(nn.Module):
         self.dropout = nn.Dropout(dropout)
         self.activation = F.relu if activation == "relu" else F.gelu
 
-    def forward(self, x, cross, x_mask=None, cross_mask=None):
+    def forward(self, x, cross, x_mask=None, cross_mask=None, cache=None):
+        """
+        With a `cache` (see `TransDecoder.init_cache`), `x` only holds the new target positions: the
+        self-attention keys/values of the previous positions and the projected `cross` keys/values
+        are read from the cache, and `(x, cache)` is returned.
+        """
+        # The cache arguments are only passed with a cache, so attention modules without them keep working
+        self_kwargs = dict(cache=cache['self']) if cache is not None else {}
+        cross_kwargs = dict(cache=cache['cross'], static_kv=True) if cache is not None else {}
+
         x = x + self.dropout(self.self_attention(
             x, x, x,
-            attn_mask=x_mask
+            attn_mask=x_mask,
+            **self_kwargs
         )[0])
         x = self.norm1(x)
 
         x = x + self.dropout(self.cross_attention(
             x, cross, cross,
-            attn_mask=cross_mask
+            attn_mask=cross_mask,
+            **cross_kwargs
         )[0])
 
         y = x = self.norm2(x)
         y = self.dropout(self.activation(self.conv1(y.transpose(-1, 1))))
         y = self.dropout(self.conv2(y).transpose(-1, 1))
 
+        if cache is not None:
+            return self.norm3(x + y), cache
         return self.norm3(x + y)
 
 
@@ -252,19 +329,106 @@ class TransDecoder(nn.Module):
         self.norm = norm_layer
         self.projection = projection
 
-    def forward(self, x, cross, x_mask=None, cross_mask=None):
-        for layer in self.layers:
-            x = layer(x, cross, x_mask=x_mask, cross_mask=cross_mask)
+    def init_cache(self):
+        """
+        Empty per-layer cache for incremental decoding: the self-attention keys/values of the decoded
+        positions and the cross-attention keys/values, projected once from `cross`.
+        """
+        return [dict(self={}, cross={}) for _ in self.layers]
+
+    def forward(self, x, cross, x_mask=None, cross_mask=None, cache=None):
+        """
+        Decode `x` of dim [B,L,D] attending to `cross` of dim [B,S,D]. With a `cache` from `init_cache`,
+        `x` only holds the new positions (e.g. one token per step), the self-attention must be causal,
+        and `(x, cache)` is returned.
+        """
+        for i, layer in enumerate(self.layers):
+            if cache is None:
+                x = layer(x, cross, x_mask=x_mask, cross_mask=cross_mask)
+            else:
+                x, _ = layer(x, cross, x_mask=x_mask, cross_mask=cross_mask, cache=cache[i])
 
         if self.norm is not None:
             x = self.norm(x)
 
         if self.projection is not None:
             x = self.projection(x)
+        if cache is not None:
+            return x, cache
         return x
 
-# %% ../../nbs/common.modules.ipynb 17
+# %% ../../nbs/common.modules.ipynb 18
+class ScaledDotProductAttention(nn.Module):
+    """ Scaled Dot Product Attention
+
+    Inner attention of `AttentionLayer` based on `torch.nn.functional.scaled_dot_product_attention`,
+    which uses fused kernels and does not materialize the [B,H,L,S] attention weights.
+
+    **Parameters:**<br>
+    `causal`: bool, if True each query only attends to the keys up to its own position. With fewer
+    queries than keys (incremental decoding) the queries are aligned with the last keys.<br>
+    `attention_dropout`: float, dropout rate of the attention weights.<br>
+    `return_attention`: bool, if True the attention weights are computed explicitly and returned.<br>
+    `scale`: float, optional, scaling of the scores, 1/sqrt(E) by default.<br>
+
+    `attn_mask` ([L,S], [B,L,S] or [B,H,L,S]) and `key_padding_mask` ([B,S]) are boolean masks where
+    True marks the pairs and keys that cannot be attended.<br>
+
+    **Returns:**<br>
+    `out`: tensor, attention output of dim [B,L,H,D].<br>
+    `attn`: tensor of dim [B,H,L,S], or None when `return_attention` is False.<br>
+    """
+    def __init__(self, causal=False, attention_dropout=0.1, return_attention=False, scale=None):
+        super(ScaledDotProductAttention, self).__init__()
+        self.causal = causal
+        self.attention_dropout = attention_dropout
+        self.return_attention = return_attention
+        self.scale = scale
+
+    def _allowed(self, attn_mask, key_padding_mask, L, S, device):
+        # Boolean mask of the allowed query/key pairs broadcastable to [B,H,L,S], None if all are allowed
+        allowed = None
+        if attn_mask is not None:
+            # [L,S], [B,L,S] or [B,H,L,S], True marks the masked pairs
+            allowed = ~(attn_mask.unsqueeze(1) if attn_mask.dim() == 3 else attn_mask)
+        if key_padding_mask is not None:
+            # [B,S], True marks the padded keys
+            padding = ~key_padding_mask[:, None, None, :]
+            allowed = padding if allowed is None else allowed & padding
+        # With as many queries as keys and no other mask, the fused causal kernel is used
+        if self.causal and (allowed is not None or L != S or self.return_attention):
+            causal = torch.ones(L, S, dtype=torch.bool, device=device).tril(diagonal=S - L)
+            allowed = causal if allowed is None else allowed & causal
+        return allowed
+
+    def forward(self, queries, keys, values, attn_mask=None, key_padding_mask=None):
+        L, S = queries.size(1), keys.size(1)
+        # [B,L,H,E] -> [B,H,L,E]
+        queries, keys, values = (t.transpose(1, 2) for t in (queries, keys, values))
+        allowed = self._allowed(attn_mask, key_padding_mask, L, S, queries.device)
+        dropout_p = self.attention_dropout if self.training else 0.
+
+        if not self.return_attention:
+            out = F.scaled_dot_product_attention(
+                queries, keys, values, attn_mask=allowed, dropout_p=dropout_p,
+                is_causal=self.causal and allowed is None, scale=self.scale)
+            return out.transpose(1, 2).contiguous(), None
+
+        scale = self.scale or 1. / math.sqrt(queries.size(-1))
+        scores = torch.matmul(queries, keys.transpose(-2, -1)) * scale
+        if allowed is not None:
+            scores = scores.masked_fill(~allowed, float('-inf'))
+        attn = torch.softmax(scores, dim=-1)
+        out = torch.matmul(F.dropout(attn, p=dropout_p), values)
+        return out.transpose(1, 2).contiguous(), attn
+
+
 class AttentionLayer(nn.Module):
+    """ Attention Layer
+
+    Multi-head attention: projects the queries, keys and values, applies the `attention` inner
+    attention (`ScaledDotProductAttention` when None) and projects the output back.
+    """
     def __init__(self, attention, hidden_size, n_head, d_keys=None,
                  d_values=None):
         super(AttentionLayer, self).__init__()
@@ -272,51 +436,97 @@ class AttentionLayer(nn.Module):
         d_keys = d_keys or (hidden_size // n_head)
         d_values = d_values or (hidden_size // n_head)
 
-        self.inner_attention = attention
+        self.inner_attention = attention if attention is not None else ScaledDotProductAttention()
         self.query_projection = nn.Linear(hidden_size, d_keys * n_head)
         self.key_projection = nn.Linear(hidden_size, d_keys * n_head)
         self.value_projection = nn.Linear(hidden_size, d_values * n_head)
         self.out_projection = nn.Linear(d_values * n_head, hidden_size)
         self.n_head = n_head
 
-    def forward(self, queries, keys, values, attn_mask):
+    def forward(self, queries, keys, values, attn_mask=None, key_padding_mask=None, cache=None, static_kv=False):
+        """
+        `cache` is an optional dict updated in place with the projected keys/values: the new ones are
+        appended to the cached ones, or with `static_kv` (e.g. cross attention to a fixed encoder
+        output) they are projected on the first call and reused afterwards.
+        """
         B, L, _ = queries.shape
-        _, S, _ = keys.shape
         H = self.n_head
 
         queries = self.query_projection(queries).view(B, L, H, -1)
-        keys = self.key_projection(keys).view(B, S, H, -1)
-        values = self.value_projection(values).view(B, S, H, -1)
-
+        if cache is not None and static_kv and 'keys' in cache:
+            keys, values = cache['keys'], cache['values']
+        else:
+            S = keys.size(1)
+            keys = self.key_projection(keys).view(B, S, H, -1)
+            values = self.value_projection(values).view(B, S, H, -1)
+            if cache is not None:
+                if not static_kv and 'keys' in cache:
+                    keys = torch.cat([cache['keys'], keys], dim=1)
+                    values = torch.cat([cache['values'], values], dim=1)
+                cache['keys'], cache['values'] = keys, values
+
+        # Padding masks are only passed to the inner attentions that support them
+        padding = {} if key_padding_mask is None else dict(key_padding_mask=key_padding_mask)
         out, attn = self.inner_attention(
             queries,
             keys,
             values,
-            attn_mask
+            attn_mask,
+            **padding
         )
         out = out.view(B, L, -1)
 
         return self.out_projection(out), attn
 
-# %% ../../nbs/common.modules.ipynb 18
+# %% ../../nbs/common.modules.ipynb 21
+_SINUSOIDAL_TABLES = {}
+_SINUSOIDAL_TABLES_LOCK = threading.Lock()
+
+def sinusoidal_table(length, dim, dtype=torch.float32, device=None):
+    """
+    Sinusoidal encodings [length,dim] of the positions 0 to length-1, shared by the whole process.
+    There is one table per (dim, dtype, device), grown on demand, and every call returns a view of
+    its first `length` rows, so the modules using it hold no copies and save no buffers.
+    """
+    key = (dim, dtype, torch.device(device or 'cpu'))
+    table = _SINUSOIDAL_TABLES.get(key)
+    if table is None or table.size(0) < length:
+        with _SINUSOIDAL_TABLES_LOCK:
+            # Another thread may have grown the table while this one waited
+            table = _SINUSOIDAL_TABLES.get(key)
+            if table is None or table.size(0) < length:
+                # Grow geometrically so increasing lengths rebuild the table only a few times
+                size = max(length, 2 * table.size(0) if table is not None else 0)
+                # Compute the positional encodings once in log space.
+                pe = torch.zeros(size, dim).float()
+                position = torch.arange(0, size).float().unsqueeze(1)
+                div_term = (torch.arange(0, dim, 2).float() * -(math.log(10000.0) / dim)).exp()
+
+                pe[:, 0::2] = torch.sin(position * div_term)
+                pe[:, 1::2] = torch.cos(position * div_term)
+
+                table = pe.to(dtype=dtype, device=key[2])
+                _SINUSOIDAL_TABLES[key] = table
+    return table[:length]
+
+def _drop_legacy_tables(state_dict, prefix, names):
+    # Checkpoints saved before the tables were shared still carry them
+    for name in names:
+        state_dict.pop(prefix + name, None)
+
 class PositionalEmbedding(nn.Module):
     def __init__(self, hidden_size, max_len=5000):
         super(PositionalEmbedding, self).__init__()
-        # Compute the positional encodings once in log space.
-        pe = torch.zeros(max_len, hidden_size).float()
-        pe.require_grad = False
-
-        position = torch.arange(0, max_len).float().unsqueeze(1)
-        div_term = (torch.arange(0, hidden_size, 2).float() * -(math.log(10000.0) / hidden_size)).exp()
-
-        pe[:, 0::2] = torch.sin(position * div_term)
-        pe[:, 1::2] = torch.cos(position * div_term)
-
-        pe = pe.unsqueeze(0)
-        self.register_buffer('pe', pe)
+        self.hidden_size = hidden_size
+        # Kept for compatibility, the shared table grows past it on demand
+        self.max_len = max_len
 
     def forward(self, x):
-        return self.pe[:, :x.size(1)]
+        return sinusoidal_table(x.size(1), self.hidden_size, x.dtype, x.device).unsqueeze(0)
+
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        _drop_legacy_tables(state_dict, prefix, ['pe'])
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
 
 class TokenEmbedding(nn.Module):
     def __init__(self, c_in, hidden_size):
@@ -343,20 +553,15 @@ class TimeFeatureEmbedding(nn.Module):
 class FixedEmbedding(nn.Module):
     def __init__(self, c_in, d_model):
         super(FixedEmbedding, self).__init__()
-
-        w = torch.zeros(c_in, d_model, dtype=torch.float32, requires_grad=False)
-        position = torch.arange(0, c_in, dtype=torch.float32).unsqueeze(1)
-        div_term = (torch.arange(0, d_model, 2).float()
-                    * -(math.log(10000.0) / d_model)).exp()
-
-        w[:, 0::2] = torch.sin(position * div_term)
-        w[:, 1::2] = torch.cos(position * div_term)
-
-        self.emb = nn.Embedding(c_in, d_model)
-        self.emb.weight = nn.Parameter(w, requires_grad=False)
+        self.c_in = c_in
+        self.d_model = d_model
 
     def forward(self, x):
-        return self.emb(x).detach()
+        return F.embedding(x, sinusoidal_table(self.c_in, self.d_model, device=x.device))
+
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        _drop_legacy_tables(state_dict, prefix, ['emb.weight'])
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
     
 class TemporalEmbedding(nn.Module):
     def __init__(self, d_model, embed_type='fixed', freq='h'):
@@ -421,14 +626,18 @@ class DataEmbedding(nn.Module):
 
         return self.dropout(x)
 
-# %% ../../nbs/common.modules.ipynb 19
+# %% ../../nbs/common.modules.ipynb 23
 class MovingAvg(nn.Module):
     """
     Moving average block to highlight the trend of time series
+
+    `step` appends one observation per series and returns the trend of the new last point, equal
+    to the last value of `forward` over the whole history, in O(1) from a running window sum.
     """
     def __init__(self, kernel_size, stride):
         super(MovingAvg, self).__init__()
         self.kernel_size = kernel_size
+        self.stride = stride
         self.avg = nn.AvgPool1d(kernel_size=kernel_size, stride=stride, padding=0)
 
     def forward(self, x):
@@ -439,6 +648,44 @@ class MovingAvg(nn.Module):
         x = self.avg(x.permute(0, 2, 1))
         x = x.permute(0, 2, 1)
         return x
+
+    def _check_streaming(self):
+        assert self.kernel_size % 2 == 1 and self.stride == 1, \
+            'Streaming requires an odd kernel_size and stride=1'
+
+    def init_state(self, x):
+        """
+        Streaming state of the history `x` of dim [B,T,C]: the last (kernel_size+1)//2 values, front
+        padded with the first value as in `forward`, and their sum.
+        """
+        self._check_streaming()
+        n_window = (self.kernel_size + 1) // 2
+        window = x[:, -n_window:]
+        if window.size(1) < n_window:
+            front = x[:, 0:1, :].repeat(1, n_window - window.size(1), 1)
+            window = torch.cat([front, window], dim=1)
+        window = window.detach().clone()
+        return dict(window=window, sum=window.sum(dim=1, keepdim=True), position=0)
+
+    def step(self, x_t, state=None):
+        """
+        Append `x_t` of dim [B,1,C] to the series (`state=None` starts new series).
+
+        **Returns:**<br>
+        `trend`: tensor, moving average at the new last point of dim [B,1,C].<br>
+        `state`: dict, updated streaming state (updated in place).<br>
+        """
+        if state is None:
+            state = self.init_state(x_t)
+        else:
+            # Replace the oldest value of the ring buffer
+            position = state['position']
+            state['sum'] = state['sum'] + x_t - state['window'][:, position:position + 1]
+            state['window'][:, position:position + 1] = x_t
+            state['position'] = (position + 1) % state['window'].size(1)
+        # The end of the window is padded with the last value, as in `forward`
+        trend = (state['sum'] + (self.kernel_size - 1) // 2 * x_t) / self.kernel_size
+        return trend, state
     
 class SeriesDecomp(nn.Module):
     """
@@ -453,9 +700,30 @@ class SeriesDecomp(nn.Module):
         res = x - moving_mean
         return res, moving_mean
 
-# %% ../../nbs/common.modules.ipynb 20
+    def init_state(self, x):
+        """Streaming state of the history `x` of dim [B,T,C], see `MovingAvg.init_state`."""
+        return self.MovingAvg.init_state(x)
+
+    def step(self, x_t, state=None):
+        """
+        Append `x_t` of dim [B,1,C] to the series and decompose the new last point.
+
+        **Returns:**<br>
+        `res`: tensor, residual of dim [B,1,C].<br>
+        `moving_mean`: tensor, trend of dim [B,1,C].<br>
+        `state`: dict, updated streaming state.<br>
+        """
+        moving_mean, state = self.MovingAvg.step(x_t, state)
+        return x_t - moving_mean, moving_mean, state
+
+# %% ../../nbs/common.modules.ipynb 24
 class RevIN(nn.Module):
     """ RevIN (Reversible-Instance-Normalization)
+
+    `norm` and `denorm` are stateless: `norm` returns the instance statistics next to the normalized
+    tensor and `denorm` takes them back, so a single module can serve concurrent batches. The
+    `forward(x, 'norm')` / `forward(x, 'denorm')` interface keeps the statistics of the last
+    normalized batch on the module.
     """
     def __init__(self, num_features: int, eps=1e-5, affine=False, subtract_last=False, non_norm=False):
         """
@@ -475,16 +743,57 @@ class RevIN(nn.Module):
         if self.affine:
             self._init_params()
 
-    def forward(self, x, mode: str):
+    def forward(self, x, mode: str, stats=None):
         if mode == 'norm':
-            self._get_statistics(x)
-            x = self._normalize(x)
+            x, stats = self.norm(x)
+            self._set_statistics(stats)
         elif mode == 'denorm':
-            x = self._denormalize(x)
+            x = self.denorm(x, stats if stats is not None else self._stored_statistics())
         else:
             raise NotImplementedError
         return x
 
+    def norm(self, x):
+        """
+        Normalize `x` of dim [B,T,C] with its instance statistics.
+
+        **Returns:**<br>
+        `x`: tensor, normalized `x`.<br>
+        `stats`: tuple, `(center, stdev)` of dim [B,1,C] each, to pass to `denorm`.<br>
+        """
+        stats = self._get_statistics(x)
+        return self._normalize(x, stats), stats
+
+    def denorm(self, x, stats):
+        """Invert the normalization of `x` with the `stats` returned by `norm`."""
+        return self._denormalize(x, stats)
+
+    def init_state(self, x):
+        """Streaming state (count, mean and sum of squared deviations) of the history `x` of dim [B,T,C]."""
+        mean = torch.mean(x, dim=1, keepdim=True).detach()
+        return dict(count=x.size(1), mean=mean, m2=((x.detach() - mean) ** 2).sum(dim=1, keepdim=True))
+
+    def step(self, x_t, state=None):
+        """
+        Append `x_t` of dim [B,1,C] to the series and normalize it with the statistics of the whole
+        history, updated in O(1) with Welford's algorithm.
+
+        **Returns:**<br>
+        `x`: tensor, normalized `x_t`.<br>
+        `stats`: tuple, statistics of the history, equal to `norm(history)[1]`.<br>
+        `state`: dict, updated streaming state.<br>
+        """
+        if state is None:
+            state = self.init_state(x_t)
+        else:
+            count = state['count'] + 1
+            delta = x_t.detach() - state['mean']
+            mean = state['mean'] + delta / count
+            state.update(count=count, mean=mean, m2=state['m2'] + delta * (x_t.detach() - mean))
+        center = x_t if self.subtract_last else state['mean']
+        stats = (center, torch.sqrt(state['m2'] / state['count'] + self.eps))
+        return self._normalize(x_t, stats), stats, state
+
     def _init_params(self):
         # initialize RevIN params: (C,)
         self.affine_weight = nn.Parameter(torch.ones(self.num_features))
@@ -493,33 +802,40 @@ class RevIN(nn.Module):
     def _get_statistics(self, x):
         dim2reduce = tuple(range(1, x.ndim - 1))
         if self.subtract_last:
-            self.last = x[:, -1, :].unsqueeze(1)
+            center = x[:, -1, :].unsqueeze(1)
         else:
-            self.mean = torch.mean(x, dim=dim2reduce, keepdim=True).detach()
-        self.stdev = torch.sqrt(torch.var(x, dim=dim2reduce, keepdim=True, unbiased=False) + self.eps).detach()
+            center = torch.mean(x, dim=dim2reduce, keepdim=True).detach()
+        stdev = torch.sqrt(torch.var(x, dim=dim2reduce, keepdim=True, unbiased=False) + self.eps).detach()
+        return center, stdev
 
-    def _normalize(self, x):
-        if self.non_norm:
-            return x
+    def _set_statistics(self, stats):
+        center, self.stdev = stats
         if self.subtract_last:
-            x = x - self.last
+            self.last = center
         else:
-            x = x - self.mean
-        x = x / self.stdev
+            self.mean = center
+
+    def _stored_statistics(self):
+        return (self.last if self.subtract_last else self.mean), self.stdev
+
+    def _normalize(self, x, stats):
+        if self.non_norm:
+            return x
+        center, stdev = stats
+        x = x - center
+        x = x / stdev
         if self.affine:
             x = x * self.affine_weight
             x = x + self.affine_bias
         return x
 
-    def _denormalize(self, x):
+    def _denormalize(self, x, stats):
         if self.non_norm:
             return x
+        center, stdev = stats
         if self.affine:
             x = x - self.affine_bias
             x = x / (self.affine_weight + self.eps * self.eps)
-        x = x * self.stdev
-        if self.subtract_last:
-            x = x + self.last
-        else:
-            x = x + self.mean
+        x = x * stdev
+        x = x + center
         return x
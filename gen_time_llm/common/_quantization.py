@@ -0,0 +1,141 @@
+"""Reduced precision CPU inference for the frozen LLM of the models"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/common.quantization.ipynb.
+
+# %% auto 0
+__all__ = ['LLM_INFERENCE_DTYPES', 'quantize_frozen_llm', 'llm_memory_bytes', 'compare_inference']
+
+# %% ../../nbs/common.quantization.ipynb 3
+import copy
+import io
+import time
+
+import torch
+import torch.nn as nn
+
+# %% ../../nbs/common.quantization.ipynb 6
+LLM_INFERENCE_DTYPES = ['int8', 'bf16']
+
+def _conv1d_to_linear(module):
+    """
+    Replace the `Conv1D` layers of GPT-2 style models (linear layers with transposed weights)
+    by `nn.Linear`, so they are picked up by dynamic quantization.
+    """
+    for name, child in module.named_children():
+        if type(child).__name__ == 'Conv1D':
+            linear = nn.Linear(child.weight.shape[0], child.nf)
+            linear.weight = nn.Parameter(child.weight.t().contiguous(), requires_grad=False)
+            linear.bias = nn.Parameter(child.bias.detach(), requires_grad=False)
+            setattr(module, name, linear)
+        else:
+            _conv1d_to_linear(child)
+    return module
+
+def _cast_floating(x, dtype):
+    if torch.is_tensor(x) and x.is_floating_point():
+        return x.to(dtype)
+    return x
+
+def _bf16_inputs_hook(module, args, kwargs):
+    return (tuple(_cast_floating(a, torch.bfloat16) for a in args),
+            {k: _cast_floating(v, torch.bfloat16) for k, v in kwargs.items()})
+
+def _fp32_outputs_hook(module, args, output):
+    if torch.is_tensor(output):
+        return _cast_floating(output, torch.float32)
+    if hasattr(output, 'keys'):
+        for key in list(output.keys()):
+            output[key] = _cast_floating(output[key], torch.float32)
+    return output
+
+def _outer_frozen_modules(model):
+    """Frozen modules of `model` that are not part of another frozen module (e.g. `llm` inside `llm_head`)."""
+    modules = {name: getattr(model, name) for name in model.frozen_modules}
+    return {
+        name: module for name, module in modules.items()
+        if not any(other is not module and any(m is module for m in other.modules()) for other in modules.values())
+    }
+
+def quantize_frozen_llm(model, dtype='int8', inplace=False):
+    """
+    Inference version of `model` with a reduced precision frozen LLM.
+
+    **Parameters:**<br>
+    `model`: BaseModel, model listing its frozen LLM modules in `frozen_modules`.<br>
+    `dtype`: str, 'int8' for dynamic int8 quantization of the linear layers, 'bf16' for bfloat16.<br>
+    `inplace`: bool, if False the model is copied before quantization. The frozen modules are shared
+    with the other models of the process (see `load_frozen_backbone`), so they are always copied.<br>
+
+    **Returns:**<br>
+    `model`: BaseModel, model in evaluation mode, the trainable parts are kept in fp32.<br>
+    """
+    assert dtype in LLM_INFERENCE_DTYPES, f'{dtype} is not in {LLM_INFERENCE_DTYPES}'
+    if not inplace:
+        model = copy.deepcopy(model)
+    else:
+        # Copied together, so the frozen modules nested in one another (`llm` in `llm_head`) stay nested
+        frozen = copy.deepcopy({name: getattr(model, name) for name in model.frozen_modules})
+        for name, module in frozen.items():
+            setattr(model, name, module)
+
+    for name, module in _outer_frozen_modules(model).items():
+        if dtype == 'int8':
+            module = torch.ao.quantization.quantize_dynamic(
+                _conv1d_to_linear(module), {nn.Linear}, dtype=torch.qint8, inplace=True)
+        else:
+            # Activations are cast at the module boundary so the fp32 encoder can feed it
+            module = module.to(torch.bfloat16)
+            module.register_forward_pre_hook(_bf16_inputs_hook, with_kwargs=True)
+            module.register_forward_hook(_fp32_outputs_hook)
+        setattr(model, name, module)
+
+    return model.eval()
+
+# %% ../../nbs/common.quantization.ipynb 9
+def _state_dict_bytes(module):
+    buffer = io.BytesIO()
+    torch.save(module.state_dict(), buffer)
+    return buffer.tell()
+
+def llm_memory_bytes(model):
+    """Serialized size in bytes of the frozen LLM modules of `model`."""
+    return sum(_state_dict_bytes(module) for module in _outer_frozen_modules(model).values())
+
+@torch.no_grad()
+def compare_inference(reference, candidate, batches, n_repeats=1):
+    """
+    Compare a reduced precision `candidate` (see `quantize_frozen_llm`) against the fp32 `reference`.
+
+    The accuracy check is the teacher forced loss over `batches`; the latency is the mean time
+    per batch after one warm-up batch, and the memory is the size of the frozen LLM weights.
+
+    **Returns:**<br>
+    `report`: dict, losses, loss delta, latencies, speedup and LLM memory of both models.<br>
+    """
+    def run(model):
+        model.eval()
+        model(batches[0], batches[0][model.output_key], teacher_forcing=True)
+        losses = []
+        start = time.perf_counter()
+        for _ in range(n_repeats):
+            for batch in batches:
+                losses.append(model(batch, batch[model.output_key], teacher_forcing=True).float().item())
+        latency = (time.perf_counter() - start) / len(losses)
+        return sum(losses) / len(losses), latency
+
+    reference_loss, reference_latency = run(reference)
+    candidate_loss, candidate_latency = run(candidate)
+    reference_bytes = llm_memory_bytes(reference)
+    candidate_bytes = llm_memory_bytes(candidate)
+
+    return dict(
+        reference_loss=reference_loss,
+        candidate_loss=candidate_loss,
+        loss_delta=candidate_loss - reference_loss,
+        reference_latency_s=reference_latency,
+        candidate_latency_s=candidate_latency,
+        speedup=reference_latency / candidate_latency,
+        reference_llm_bytes=reference_bytes,
+        candidate_llm_bytes=candidate_bytes,
+        memory_ratio=candidate_bytes / reference_bytes,
+    )
@@ -0,0 +1,65 @@
+"""Process-wide registry of the time spent in the stages of a training step"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/common.timing.ipynb.
+
+# %% auto 0
+__all__ = ['STAGE_TIMINGS_KEY', 'enable_stage_timing', 'stage_timing_enabled', 'stage', 'drain_stage_timings',
+           'attach_stage_timings']
+
+# %% ../../nbs/common.timing.ipynb 4
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+
+# %% ../../nbs/common.timing.ipynb 6
+STAGE_TIMINGS_KEY = '_stage_timings'
+_ENV_FLAG = 'GEN_TIME_LLM_STAGE_TIMING'
+
+_enabled = os.environ.get(_ENV_FLAG) == '1'
+_events = []
+_events_lock = threading.Lock()
+_disabled = nullcontext()
+
+def enable_stage_timing(enabled=True):
+    """Turn the stage timing on or off, in this process and in the processes it starts."""
+    global _enabled
+    _enabled = enabled
+    if enabled:
+        os.environ[_ENV_FLAG] = '1'
+    else:
+        os.environ.pop(_ENV_FLAG, None)
+
+def stage_timing_enabled():
+    return _enabled
+
+@contextmanager
+def _timed(name):
+    start, wall = time.perf_counter_ns(), time.time_ns()
+    try:
+        yield
+    finally:
+        event = (name, wall // 1000, (time.perf_counter_ns() - start) // 1000, os.getpid(), threading.get_ident())
+        with _events_lock:
+            _events.append(event)
+
+def stage(name):
+    """
+    Context timing the stage `name` when the stage timing is enabled. The events are
+    `(name, start_us, duration_us, pid, tid)`, with the start on the wall clock so the events of
+    different processes line up.
+    """
+    return _timed(name) if _enabled else _disabled
+
+def drain_stage_timings():
+    """Return and clear the events recorded in this process."""
+    global _events
+    with _events_lock:
+        events, _events = _events, []
+    return events
+
+def attach_stage_timings(batch):
+    """Move the events recorded in this process (e.g. a loader worker) into the dict `batch`."""
+    if _enabled and isinstance(batch, dict):
+        batch[STAGE_TIMINGS_KEY] = drain_stage_timings()
+    return batch
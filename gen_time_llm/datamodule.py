@@ -0,0 +1,104 @@
+"""Lightning DataModule for the time series datasets"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/datamodule.ipynb.
+
+# %% auto 0
+__all__ = ['TimeSeriesDataModule']
+
+# %% ../nbs/datamodule.ipynb 4
+import pytorch_lightning as pl
+
+from .tsdataset import LengthBasedBatchSampler, TimeSeriesLoader, TimeSeriesDataset
+
+# %% ../nbs/datamodule.ipynb 5
+class TimeSeriesDataModule(pl.LightningDataModule):
+    
+    def __init__(
+            self, 
+            train_dataset: TimeSeriesDataset,  # Separate dataset for training
+            val_dataset: TimeSeriesDataset,    # Separate dataset for validation
+            tokenizer,                         # Tokenizer for all datasets
+            batch_size=32, 
+            valid_batch_size=8,
+            num_workers=0,
+            drop_last=False,
+            shuffle_train=True,
+            test_dataset: TimeSeriesDataset = None,   # Separate dataset for testing (optional)
+        ):
+        """
+        A DataModule for loading time series data, supporting training, validation, and prediction.
+        
+        Parameters:
+        - train_dataset: The TimeSeriesDataset instance for the training data.
+        - val_dataset: The TimeSeriesDataset instance for the validation data.
+        - test_dataset: The TimeSeriesDataset instance for the test data (optional).
+        - tokenizer: The tokenizer used for tokenizing summaries (e.g., from HuggingFace's Transformers library).
+        - batch_size: Batch size for the training data.
+        - valid_batch_size: Batch size for the validation and test data.
+        - num_workers: Number of workers for data loading (default: 0).
+        - drop_last: Whether to drop the last incomplete batch (default: False).
+        - shuffle_train: Whether to shuffle the training data (default: True).
+        """
+        super().__init__()
+        self.train_dataset = train_dataset
+        self.val_dataset = val_dataset
+        self.test_dataset = test_dataset
+        self.tokenizer = tokenizer
+        self.batch_size = batch_size
+        self.valid_batch_size = valid_batch_size
+        self.num_workers = num_workers
+        self.drop_last = drop_last
+        self.shuffle_train = shuffle_train
+
+        self.tokenizer.pad_token = self.tokenizer.eos_token  # Ensure padding token is set
+    
+    def train_dataloader(self):
+        """
+        Creates and returns a DataLoader for the training dataset.
+        """
+        sampler = LengthBasedBatchSampler(self.train_dataset, batch_size=self.batch_size, sort_key='summary_input_ids')
+        # loader = TimeSeriesLoader(
+        #     self.train_dataset,
+        #     tokenizer=self.tokenizer,  # Pass the tokenizer
+        #     batch_size=self.batch_size, 
+        #     num_workers=self.num_workers,
+        #     shuffle=self.shuffle_train,
+        #     # batch_sampler=sampler,
+        #     drop_last=self.drop_last
+        # )
+        loader = TimeSeriesLoader(
+            self.train_dataset,
+            tokenizer=self.tokenizer,
+            num_workers=self.num_workers,
+            batch_sampler=sampler
+        )
+        return loader
+    
+    def val_dataloader(self):
+        """
+        Creates and returns a DataLoader for the validation dataset.
+        """
+        loader = TimeSeriesLoader(
+            self.val_dataset, 
+            tokenizer=self.tokenizer,  # Pass the tokenizer
+            batch_size=self.valid_batch_size, 
+            num_workers=self.num_workers,
+            shuffle=False,
+            drop_last=self.drop_last
+        )
+        return loader
+    
+    def test_dataloader(self):
+        """
+        Creates and returns a DataLoader for the test dataset.
+        """
+        if self.test_dataset:
+            loader = TimeSeriesLoader(
+                self.test_dataset,
+                tokenizer=self.tokenizer,  # Pass the tokenizer
+                batch_size=self.valid_batch_size, 
+                num_workers=self.num_workers,
+                shuffle=False
+            )
+            return loader
+        return None
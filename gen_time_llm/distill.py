@@ -0,0 +1,202 @@
+"""Train a smaller decoder from the frozen LLM of a trained model"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/distill.ipynb.
+
+# %% auto 0
+__all__ = ['make_student', 'swap_decoder', 'distillation_loss', 'DistillationModel', 'evaluate_student', 'export_student']
+
+# %% ../nbs/distill.ipynb 4
+import copy
+import math
+import time
+
+import torch
+import torch.nn.functional as F
+
+from .common._backbones import _backbone_blocks
+from .common._base_model import BaseModel
+from .metrics import text_metrics
+
+# %% ../nbs/distill.ipynb 7
+def _blocks_prefix(model):
+    blocks = _backbone_blocks(model)
+    return next(name for name, module in model.named_modules() if module is blocks)
+
+def make_student(teacher, num_layers, **config_overrides):
+    """
+    Smaller causal LM initialized from `teacher`, built from its config without downloading anything.
+
+    **Parameters:**<br>
+    `teacher`: PreTrainedModel, causal LM to distill.<br>
+    `num_layers`: int, number of blocks of the student, taken from evenly spaced teacher blocks.<br>
+    `config_overrides`: config attributes of the student, e.g. a narrower `n_inner` or `n_head` (blocks whose shapes change are randomly initialized). The hidden size must stay the teacher's.<br>
+
+    **Returns:**<br>
+    `student`: PreTrainedModel, student LM, with the token embeddings (and the tied LM head) of the teacher frozen.<br>
+    """
+    from transformers import AutoModelForCausalLM
+
+    config = copy.deepcopy(teacher.config)
+    layers_key = 'n_layer' if hasattr(config, 'n_layer') else 'num_hidden_layers'
+    teacher_layers = getattr(config, layers_key)
+    assert num_layers <= teacher_layers, f'The student cannot have more blocks than the teacher ({teacher_layers})'
+    setattr(config, layers_key, num_layers)
+    for name, value in config_overrides.items():
+        setattr(config, name, value)
+    student = AutoModelForCausalLM.from_config(config).to(teacher.dtype)
+    assert student.get_input_embeddings().weight.shape == teacher.get_input_embeddings().weight.shape, \
+        'The student must keep the hidden size and the vocabulary of the teacher'
+
+    # Student block j starts from teacher block layers[j], the other weights are copied as they are
+    layers = torch.linspace(0, teacher_layers - 1, num_layers).round().long().tolist()
+    prefix = _blocks_prefix(teacher) + '.'
+    state = {}
+    for key, value in teacher.state_dict().items():
+        if not key.startswith(prefix):
+            state[key] = value
+            continue
+        index, name = key[len(prefix):].split('.', 1)
+        for j, i in enumerate(layers):
+            if int(index) == i:
+                state[f'{prefix}{j}.{name}'] = value
+    student_state = student.state_dict()
+    student.load_state_dict({key: value for key, value in state.items()
+                             if key in student_state and student_state[key].shape == value.shape}, strict=False)
+
+    student.get_input_embeddings().requires_grad_(False)
+    student.get_output_embeddings().requires_grad_(False)
+    return student
+
+def swap_decoder(model, decoder):
+    """
+    Shallow copy of `model` running `decoder` in place of its frozen LLM: the frozen modules that
+    are causal LMs are replaced by `decoder` and the others (the transformer body) by its body. The
+    other modules are shared with `model`.
+    """
+    swapped = copy.copy(model)
+    swapped._modules = dict(model._modules)
+    for name in model.frozen_modules:
+        module = getattr(model, name)
+        # Causal LMs have output embeddings, their transformer body does not
+        if getattr(module, 'get_output_embeddings', lambda: None)() is not None:
+            swapped._modules[name] = decoder
+        else:
+            swapped._modules[name] = decoder.base_model
+    return swapped
+
+# %% ../nbs/distill.ipynb 11
+def distillation_loss(student_logits, teacher_logits, target, ignore_index=-100, temperature=2., alpha=0.5):
+    """
+    `alpha` times the KL divergence between the teacher and student distributions softened by
+    `temperature` (scaled by its square), plus `1 - alpha` times the cross-entropy of the student on
+    the target, both over the non-ignored target positions.
+    """
+    mask = target != ignore_index
+    student_logits, teacher_logits = student_logits[mask].float(), teacher_logits[mask].float()
+    kl = F.kl_div(F.log_softmax(student_logits / temperature, dim=-1), F.log_softmax(teacher_logits / temperature, dim=-1),
+                  log_target=True, reduction='batchmean') * temperature ** 2
+    return alpha * kl + (1 - alpha) * F.cross_entropy(student_logits, target[mask])
+
+class DistillationModel(BaseModel):
+    """
+    Train the `student` decoder of a trained `model` (`GRUGPTModel` or `TimeLLM`) from the logits of
+    its frozen LLM. The rest of `model` is frozen and runs in evaluation mode.
+
+    **Parameters:**<br>
+    `model`: BaseModel, trained model whose frozen LLM is the teacher.<br>
+    `student`: PreTrainedModel, student decoder, see `make_student`.<br>
+    `temperature`: float, softening of the teacher and student distributions.<br>
+    `alpha`: float, weight of the distillation term, `1 - alpha` weights the cross-entropy on the summaries.<br>
+    `base_lr`: float, learning rate of the student.<br>
+    """
+
+    frozen_modules = ('model',)
+
+    def __init__(
+        self,
+        model,
+        student,
+        random_seed=1,
+        temperature: float = 2.,
+        alpha: float = 0.5,
+        base_lr: float = 1e-4,
+        **kwargs
+    ):
+        super().__init__(random_seed=random_seed, output_key=model.output_key, **kwargs)
+        # The modules are saved with the weights, not as hyperparameters
+        for name in ('model', 'student'):
+            self.hparams.pop(name, None)
+        self.model = model.requires_grad_(False)
+        self.student = student
+        self.temperature = temperature
+        self.alpha = alpha
+        self.base_lr = base_lr
+
+    def forward(self, batch, target=None, teacher_forcing=True):
+        with torch.no_grad():
+            teacher_logits, target, ignore_index = self.model.decoder_logits(batch)
+        student_logits, _, _ = swap_decoder(self.model, self.student).decoder_logits(batch)
+        return distillation_loss(student_logits, teacher_logits, target, ignore_index,
+                                 temperature=self.temperature, alpha=self.alpha)
+
+    def generate_summaries(self, batch, max_length=None):
+        return swap_decoder(self.model, self.student).generate_summaries(batch, max_length=max_length)
+
+    def reference_summaries(self, batch):
+        return self.model.reference_summaries(batch)
+
+    def configure_optimizers(self):
+        return torch.optim.AdamW([p for p in self.student.parameters() if p.requires_grad], lr=self.base_lr)
+
+# %% ../nbs/distill.ipynb 14
+@torch.no_grad()
+def evaluate_student(model, student, batches):
+    """
+    Compare the `student` decoder to the frozen LLM of `model` on `batches`.
+
+    **Returns:**<br>
+    `report`: dict with the mean cross-entropy on the summaries of the teacher and of the student, the KL divergence from the teacher, the share of target positions where both predict the same token, the text metrics of the student summaries against the teacher summaries and against the references, and the generation time of each.<br>
+    """
+    was_training = model.training
+    model.eval()
+    student_model = swap_decoder(model, student.eval())
+    totals = dict(teacher_loss=0., student_loss=0., kl=0., agreement=0.)
+    n_tokens = 0
+    summaries = dict(teacher=[], student=[], reference=[])
+    seconds = dict(teacher=0., student=0.)
+    for batch in batches:
+        teacher_logits, target, ignore_index = model.decoder_logits(batch)
+        student_logits, _, _ = student_model.decoder_logits(batch)
+        mask = target != ignore_index
+        teacher_logits, student_logits, target = teacher_logits[mask].float(), student_logits[mask].float(), target[mask]
+        n = target.numel()
+        totals['teacher_loss'] += F.cross_entropy(teacher_logits, target, reduction='sum').item()
+        totals['student_loss'] += F.cross_entropy(student_logits, target, reduction='sum').item()
+        totals['kl'] += F.kl_div(F.log_softmax(student_logits, dim=-1), F.log_softmax(teacher_logits, dim=-1),
+                                 log_target=True, reduction='sum').item()
+        totals['agreement'] += (student_logits.argmax(dim=-1) == teacher_logits.argmax(dim=-1)).sum().item()
+        n_tokens += n
+
+        for name, m in [('teacher', model), ('student', student_model)]:
+            start = time.perf_counter()
+            summaries[name] += m.generate_summaries(batch)
+            seconds[name] += time.perf_counter() - start
+        summaries['reference'] += model.reference_summaries(batch)
+    model.train(was_training)
+
+    report = {name: value / max(n_tokens, 1) for name, value in totals.items()}
+    report.update({f'{name}_vs_teacher': value for name, value in text_metrics(summaries['student'], summaries['teacher']).items()})
+    report.update({f'student_{name}': value for name, value in text_metrics(summaries['student'], summaries['reference']).items()})
+    report.update({f'teacher_{name}': value for name, value in text_metrics(summaries['teacher'], summaries['reference']).items()})
+    report.update(teacher_seconds=seconds['teacher'], student_seconds=seconds['student'],
+                  speedup=seconds['teacher'] / max(seconds['student'], 1e-9))
+    return report
+
+def export_student(student, tokenizer, path):
+    """
+    Save the `student` decoder and its `tokenizer` to `path`, loadable as the LLM of the models
+    with `llm=path`.
+    """
+    student.save_pretrained(path)
+    tokenizer.save_pretrained(path)
+    return path
@@ -0,0 +1,126 @@
+"""Generate and score the summaries of a dataset, in batches and resumably"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/evaluation.ipynb.
+
+# %% auto 0
+__all__ = ['load_model', 'evaluation_summary', 'evaluate']
+
+# %% ../nbs/evaluation.ipynb 4
+import importlib
+import json
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import torch
+from torch.utils.data import Subset
+
+from .metrics import pair_metrics
+from .tsdataset import TimeSeriesLoader
+
+# %% ../nbs/evaluation.ipynb 6
+def load_model(checkpoint_path, map_location='cpu', **kwargs):
+    """
+    Load a `BaseModel` from a Lightning checkpoint, in evaluation mode. The class of the model is
+    recorded in the checkpoint, `kwargs` override its hyperparameters. The hyperparameters hold
+    Python objects (tokenizer, optimizer class), so the checkpoint is unpickled: only load trusted files.
+    """
+    checkpoint = torch.load(checkpoint_path, map_location=map_location, weights_only=False)
+    module_name, class_name = checkpoint['model_class'].rsplit('.', 1)
+    model_cls = getattr(importlib.import_module(module_name), class_name)
+    return model_cls.load_from_checkpoint(checkpoint_path, map_location=map_location, weights_only=False,
+                                          **kwargs).eval()
+
+def _finished_records(output_path, batch_size, n_records):
+    # Number of records in the complete batches of a previous run, the rest of the file is dropped.
+    # Only the last batch of the dataset can be partial: with every record written the run is done
+    if not os.path.exists(output_path):
+        return 0
+    with open(output_path, 'rb') as f:
+        lines = f.read().split(b'\n')
+    n_lines = len(lines) - 1
+    finished = n_lines if n_lines >= n_records else n_lines - n_lines % batch_size
+    if finished < n_lines or lines[-1]:
+        with open(output_path, 'wb') as f:
+            f.writelines(line + b'\n' for line in lines[:finished])
+    return finished
+
+def _batch_records(batch, predictions, references):
+    return [
+        dict(country=batch['country'][i], sector=batch['sector'][i], year_range=batch['year_range'][i],
+             prediction=predictions[i], reference=references[i])
+        for i in range(len(predictions))
+    ]
+
+def _to_device(batch, device):
+    return {key: value.to(device) if torch.is_tensor(value) else value for key, value in batch.items()}
+
+def evaluation_summary(output_path):
+    """Mean text metrics of the records of an evaluation output, with their number as 'n_records'."""
+    totals, n = dict(rouge_l=0., bleu=0.), 0
+    with open(output_path) as f:
+        for line in f:
+            record = json.loads(line)
+            for key in totals:
+                totals[key] += record[key]
+            n += 1
+    return dict({key: value / max(n, 1) for key, value in totals.items()}, n_records=n)
+
+def evaluate(model, dataset, output_path, batch_size=8, num_workers=None, resume=True):
+    """
+    Generate the summaries of `dataset` with `model`, score them against the reference summaries and
+    stream the records to `output_path` (JSONL, in the order of the dataset).
+
+    **Parameters:**<br>
+    `model`: BaseModel, or path to its Lightning checkpoint.<br>
+    `dataset`: TimeSeriesDataset, records to summarize.<br>
+    `output_path`: str, JSONL file of the records.<br>
+    `batch_size`: int, records generated at once.<br>
+    `num_workers`: int, processes scoring the summaries (None for one per core, 0 scores in the main process).<br>
+    `resume`: bool, keep the complete batches of a previous run (with the same `batch_size`) and continue after them, or keep a finished output as it is, otherwise start over.<br>
+
+    **Returns:**<br>
+    `summary`: dict, mean 'rouge_l' and 'bleu' over all the records of `output_path` and their number 'n_records'.<br>
+    """
+    if isinstance(model, (str, os.PathLike)):
+        model = load_model(model)
+    model.eval()
+    start = _finished_records(output_path, batch_size, len(dataset)) if resume else 0
+    if start < len(dataset):
+        loader = TimeSeriesLoader(Subset(dataset, range(start, len(dataset))), tokenizer=dataset.tokenizer,
+                                  batch_size=batch_size, shuffle=False)
+        num_workers = os.cpu_count() if num_workers is None else num_workers
+        pool = ProcessPoolExecutor(num_workers) if num_workers > 0 else None
+        pending = deque()
+        index = start
+        try:
+            with open(output_path, 'a' if start else 'w') as f:
+                def write(records, scores):
+                    for record, score in zip(records, scores):
+                        f.write(json.dumps(dict(record, **score)) + '\n')
+                    f.flush()
+
+                for batch in loader:
+                    with torch.no_grad():
+                        batch = _to_device(batch, model.device)
+                        predictions = model.generate_summaries(batch)
+                    references = model.reference_summaries(batch)
+                    records = _batch_records(batch, predictions, references)
+                    for record in records:
+                        record['index'] = index
+                        index += 1
+                    if pool is None:
+                        write(records, pair_metrics(predictions, references))
+                        continue
+                    pending.append((records, pool.submit(pair_metrics, predictions, references)))
+                    # Write the batches scored so far, in order, and keep the pool busy but bounded
+                    while pending and (pending[0][1].done() or len(pending) > 2 * num_workers):
+                        records, scores = pending.popleft()
+                        write(records, scores.result())
+                while pending:
+                    records, scores = pending.popleft()
+                    write(records, scores.result())
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+    return evaluation_summary(output_path)
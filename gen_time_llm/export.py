@@ -0,0 +1,128 @@
+"""Standalone TorchScript/ONNX graphs of the time series encoders"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/export.ipynb.
+
+# %% auto 0
+__all__ = ['EXPORT_FORMATS', 'GRUPrefixEncoder', 'TimeLLMPatchEncoder', 'export_encoder', 'load_encoder']
+
+# %% ../nbs/export.ipynb 4
+import copy
+
+import torch
+import torch.nn as nn
+
+# %% ../nbs/export.ipynb 7
+class GRUPrefixEncoder(nn.Module):
+    """ GRU Prefix Encoder
+
+    Encoder of `GRUGPTModel`: runs the GRU over the time series and maps the hidden state
+    of the last layer to the GPT embedding size.
+
+    **Parameters:**<br>
+    `gru`: nn.GRU, time series encoder (batch first).<br>
+    `hidden_to_gpt`: nn.Linear, projection from the GRU hidden size to the GPT embedding size.<br>
+
+    **Returns:**<br>
+    `prefix`: tensor, prefix embeddings of dim [B,1,n_embd].<br>
+    """
+    def __init__(self, gru, hidden_to_gpt):
+        super(GRUPrefixEncoder, self).__init__()
+        self.gru = gru
+        self.hidden_to_gpt = hidden_to_gpt
+
+    def forward(self, time_series):
+        _, hidden_state = self.gru(time_series)
+        return self.hidden_to_gpt(hidden_state[-1]).unsqueeze(1)
+
+# %% ../nbs/export.ipynb 8
+class TimeLLMPatchEncoder(nn.Module):
+    """ TimeLLM Patch Encoder
+
+    Numerical encoder of `TimeLLM`: normalizes the series, keeps the `top_k` features with the
+    largest variance, patches them and reprograms the patches onto the text prototypes.
+    The prototypes (`source_embeddings`) are computed by the model's mapping layer and stored
+    as a constant buffer.
+
+    **Parameters:**<br>
+    `normalize_layer`: RevIN, instance normalization.<br>
+    `patch_embedding`: PatchEmbedding, patching and value embedding.<br>
+    `reprogramming_layer`: ReprogrammingLayer, cross attention onto the text prototypes.<br>
+    `source_embeddings`: tensor, text prototypes of dim [num_tokens,d_llm].<br>
+    `top_k`: int, number of features kept.<br>
+    `selected_features`: tensor, optional, fixed indices of the kept features (e.g. from `FeatureStatsIndex`),
+    replacing the per-batch variance selection.<br>
+
+    **Returns:**<br>
+    `enc_out`: tensor, patch embeddings of dim [B,top_k*n_patches,d_llm].<br>
+    `selected_features`: tensor, indices of the kept features of dim [top_k].<br>
+    """
+    def __init__(self, normalize_layer, patch_embedding, reprogramming_layer, source_embeddings, top_k=10,
+                 selected_features=None):
+        super(TimeLLMPatchEncoder, self).__init__()
+        self.normalize_layer = normalize_layer
+        self.patch_embedding = patch_embedding
+        self.reprogramming_layer = reprogramming_layer
+        self.register_buffer('source_embeddings', source_embeddings.detach().clone())
+        self.top_k = top_k
+        if selected_features is not None:
+            selected_features = torch.as_tensor(selected_features, dtype=torch.long).detach().clone()
+        self.register_buffer('selected_features', selected_features)
+
+    def forward(self, time_series):
+        x_enc, _ = self.normalize_layer.norm(time_series)
+        if self.selected_features is not None:
+            selected_features = self.selected_features
+        else:
+            selected_features = torch.topk(torch.var(x_enc, dim=1).mean(dim=0), self.top_k).indices
+        x_enc = x_enc[:, :, selected_features]
+        B = x_enc.size(0)
+
+        x_enc = x_enc.permute(0, 2, 1).contiguous()
+        enc_out, _ = self.patch_embedding(x_enc.to(torch.float32))
+        enc_out = self.reprogramming_layer(enc_out, self.source_embeddings, self.source_embeddings)
+        enc_out = enc_out.reshape(B, -1, enc_out.size(2))
+        return enc_out, selected_features
+
+# %% ../nbs/export.ipynb 10
+EXPORT_FORMATS = ['torchscript', 'onnx']
+
+@torch.no_grad()
+def export_encoder(encoder, path, example_inputs, format='torchscript', opset_version=17):
+    """
+    Export a time series encoder as a standalone graph.
+
+    **Parameters:**<br>
+    `encoder`: nn.Module, encoder to export, usually from a model's `prefix_encoder()`.<br>
+    `path`: str, file the artifact is written to.<br>
+    `example_inputs`: tensor, example time series of dim [B,T,C] used to trace the graph.<br>
+    `format`: str, 'torchscript' or 'onnx'.<br>
+    `opset_version`: int, ONNX opset version.<br>
+
+    **Returns:**<br>
+    `path`: str, path of the written artifact.<br>
+    """
+    assert format in EXPORT_FORMATS, f'{format} is not in {EXPORT_FORMATS}'
+    # Export a copy in evaluation mode so the model keeps its own training state
+    encoder = copy.deepcopy(encoder).eval()
+
+    if format == 'torchscript':
+        traced = torch.jit.trace(encoder, (example_inputs,), check_trace=False)
+        torch.jit.save(traced, path)
+    else:
+        outputs = encoder(example_inputs)
+        n_outputs = len(outputs) if isinstance(outputs, tuple) else 1
+        output_names = [f'output_{i}' for i in range(n_outputs)]
+        torch.onnx.export(
+            encoder, (example_inputs,), path,
+            input_names=['time_series'],
+            output_names=output_names,
+            # The batch and the series length are left free, the prefix length follows the series length
+            dynamic_axes={'time_series': {0: 'batch', 1: 'time'}, 'output_0': {0: 'batch', 1: 'sequence'}},
+            opset_version=opset_version,
+            dynamo=False,
+        )
+    return path
+
+def load_encoder(path):
+    """Load a TorchScript encoder written by `export_encoder`."""
+    return torch.jit.load(path, map_location='cpu').eval()
@@ -0,0 +1,90 @@
+"""Token by token decoding of the summaries with a KV cache"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/generation.ipynb.
+
+# %% auto 0
+__all__ = ['stream_generate']
+
+# %% ../nbs/generation.ipynb 4
+import torch
+
+# %% ../nbs/generation.ipynb 6
+class _TextDelta:
+    """
+    Incremental detokenizer of a single sequence. Only the tokens after `prefix_offset` are decoded:
+    the tokens in `[prefix_offset, read_offset)` were already emitted and give the context (e.g. the
+    leading space) of the new ones, so a step costs a few tokens instead of the whole sequence.
+    """
+    def __init__(self, tokenizer):
+        self.tokenizer = tokenizer
+        self.token_ids = []
+        self.prefix_offset = 0
+        self.read_offset = 0
+        self.prefix_text = ''
+
+    def push(self, token_id):
+        self.token_ids.append(token_id)
+        text = self.tokenizer.decode(self.token_ids[self.prefix_offset:], skip_special_tokens=True)
+        # Wait for the next tokens when the text ends inside a multi-byte character
+        if len(text) <= len(self.prefix_text) or text.endswith('�'):
+            return ''
+        delta = text[len(self.prefix_text):]
+        self.prefix_offset, self.read_offset = self.read_offset, len(self.token_ids)
+        self.prefix_text = self.tokenizer.decode(self.token_ids[self.prefix_offset:self.read_offset],
+                                                 skip_special_tokens=True)
+        return delta
+
+@torch.no_grad()
+def stream_generate(lm, inputs_embeds, tokenizer, max_new_tokens=512, cancel=None, vocab_subset=None, lm_head=None):
+    """
+    Greedy decoding of a batch with a KV cache, yielding the text produced at every step.
+
+    **Parameters:**<br>
+    `lm`: PreTrainedModel, causal LM decoding the summaries.<br>
+    `inputs_embeds`: tensor, prefix embeddings of dim [B,P,n_embd].<br>
+    `tokenizer`: tokenizer of the LM.<br>
+    `max_new_tokens`: int or list of int, token limit of the whole batch or of each sequence.<br>
+    `cancel`: threading.Event, optional, stops the stream once set.<br>
+    `vocab_subset`: VocabSubset, optional, decode only the tokens of the subset.<br>
+    `lm_head`: nn.Module, optional, head scoring the last hidden state (sliced from `lm` to the subset when not given).<br>
+
+    **Yields:**<br>
+    `deltas`: list of str, text added to each sequence at this step ('' for finished sequences).<br>
+    """
+    B = inputs_embeds.size(0)
+    if isinstance(max_new_tokens, int):
+        max_new_tokens = [max_new_tokens] * B
+    assert len(max_new_tokens) == B, 'max_new_tokens must have one limit per sequence'
+
+    device = inputs_embeds.device
+    limits = torch.tensor(max_new_tokens, device=device)
+    eos_token_id = tokenizer.eos_token_id
+    texts = [_TextDelta(tokenizer) for _ in range(B)]
+    finished = limits <= 0
+
+    # Only the last position of the body output is scored, by the full or the subset head
+    if lm_head is None:
+        lm_head = vocab_subset.slice_lm_head(lm) if vocab_subset is not None else lm.get_output_embeddings()
+    body = lm.base_model
+
+    output = body(inputs_embeds=inputs_embeds, use_cache=True)
+    step = 0
+    while not finished.all():
+        if cancel is not None and cancel.is_set():
+            return
+        next_tokens = lm_head(output.last_hidden_state[:, -1]).argmax(dim=-1)
+        if vocab_subset is not None:
+            next_tokens = vocab_subset.to_vocab(next_tokens)
+        deltas = [
+            '' if finished[b] else texts[b].push(token)
+            for b, token in enumerate(next_tokens.tolist())
+        ]
+        step += 1
+        finished = finished | (next_tokens == eos_token_id) | (limits <= step)
+        yield deltas
+        if finished.all():
+            return
+
+        # Finished sequences keep decoding the end-of-sequence token, their output is ignored
+        next_tokens = next_tokens.masked_fill(finished, eos_token_id)
+        output = body(input_ids=next_tokens.unsqueeze(1), past_key_values=output.past_key_values, use_cache=True)
@@ -0,0 +1,78 @@
+"""Lightweight ROUGE-L and BLEU scores for the generated summaries"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/metrics.ipynb.
+
+# %% auto 0
+__all__ = ['rouge_l', 'bleu', 'text_metrics', 'pair_metrics']
+
+# %% ../nbs/metrics.ipynb 4
+import math
+import re
+from collections import Counter
+
+# %% ../nbs/metrics.ipynb 6
+def _tokens(text):
+    return re.findall(r"\w+|[^\w\s]", text.lower())
+
+def _lcs_length(a, b):
+    if len(a) < len(b):
+        a, b = b, a
+    previous = [0] * (len(b) + 1)
+    for x in a:
+        current = [0]
+        for j, y in enumerate(b):
+            current.append(previous[j] + 1 if x == y else max(previous[j + 1], current[j]))
+        previous = current
+    return previous[-1]
+
+def rouge_l(prediction, reference):
+    """ROUGE-L F1 score between a generated and a reference text."""
+    prediction, reference = _tokens(prediction), _tokens(reference)
+    if not prediction or not reference:
+        return float(prediction == reference)
+    lcs = _lcs_length(prediction, reference)
+    if lcs == 0:
+        return 0.
+    precision, recall = lcs / len(prediction), lcs / len(reference)
+    return 2 * precision * recall / (precision + recall)
+
+def bleu(prediction, reference, max_n=4):
+    """Sentence BLEU (add-one smoothing of the n-gram precisions) between a generated and a reference text."""
+    prediction, reference = _tokens(prediction), _tokens(reference)
+    if not prediction or not reference:
+        return float(prediction == reference)
+    log_precision = 0.
+    for n in range(1, max_n + 1):
+        predicted = Counter(tuple(prediction[i:i + n]) for i in range(len(prediction) - n + 1))
+        expected = Counter(tuple(reference[i:i + n]) for i in range(len(reference) - n + 1))
+        matches = sum((predicted & expected).values())
+        total = max(len(prediction) - n + 1, 0)
+        # Unigrams are not smoothed so unrelated texts score 0
+        if n == 1 and matches == 0:
+            return 0.
+        log_precision += math.log((matches + (n > 1)) / (total + (n > 1)))
+    brevity_penalty = min(0., 1 - len(reference) / len(prediction))
+    return math.exp(brevity_penalty + log_precision / max_n)
+
+def text_metrics(predictions, references):
+    """
+    Mean text metrics of generated summaries.
+
+    **Parameters:**<br>
+    `predictions`: list of str, generated summaries.<br>
+    `references`: list of str, reference summaries.<br>
+
+    **Returns:**<br>
+    `metrics`: dict, mean 'rouge_l' and 'bleu' scores.<br>
+    """
+    assert len(predictions) == len(references), 'predictions and references must have the same length'
+    n = max(len(predictions), 1)
+    return dict(
+        rouge_l=sum(rouge_l(p, r) for p, r in zip(predictions, references)) / n,
+        bleu=sum(bleu(p, r) for p, r in zip(predictions, references)) / n,
+    )
+
+def pair_metrics(predictions, references):
+    """Text metrics of every generated summary, as a list of dict with the 'rouge_l' and 'bleu' scores."""
+    assert len(predictions) == len(references), 'predictions and references must have the same length'
+    return [dict(rouge_l=rouge_l(p, r), bleu=bleu(p, r)) for p, r in zip(predictions, references)]
@@ -4,25 +4,44 @@
 __all__ = ['GRUGPTModel']
 
 # %% ../../nbs/models.gru.ipynb 3
+import copy
+
 import torch
 import torch.nn as nn
-import pytorch_lightning as pl
-from transformers import GPT2LMHeadModel, GPT2Tokenizer
-import optuna
-from optuna.trial import Trial
-from pytorch_lightning import Trainer
-from pytorch_lightning.callbacks import EarlyStopping
-from pytorch_lightning.loggers import TensorBoardLogger
 
+from ..common._backbones import load_frozen_backbone, chunked_lm_loss
 from ..common._base_model import BaseModel
+from ..common._timing import stage
+from ..export import GRUPrefixEncoder
+from ..generation import stream_generate
+from ..tsdataset import VocabSubset
 
 # %% ../../nbs/models.gru.ipynb 4
+class _SubsetLogits(nn.Module):
+    """
+    LM head scoring the tokens of a `VocabSubset` only, with the scores scattered back to the full
+    vocabulary ids (the other tokens get -inf) for the generation utilities of transformers.
+    """
+    def __init__(self, subset_head, vocab_subset):
+        super().__init__()
+        self.subset_head = subset_head
+        self.vocab_subset = vocab_subset
+
+    def forward(self, hidden_states):
+        subset_logits = self.subset_head(hidden_states)
+        logits = subset_logits.new_full((*subset_logits.shape[:-1], self.vocab_subset.vocab_size), float('-inf'))
+        logits[..., self.vocab_subset.token_ids.to(logits.device)] = subset_logits
+        return logits
+
 class GRUGPTModel(BaseModel):
     """
     Model combining a GRU encoder for time series and a GPT-based decoder for text generation,
     with temporal normalization/scaling.
     """
 
+    frozen_modules = ('gpt',)
+    pretrained_modules = ('gpt', 'subset_head')
+
     def __init__(
         self,
         random_seed,
@@ -34,9 +53,12 @@ class GRUGPTModel(BaseModel):
         max_length=512,  # Maximum length of generated sequences
         num_beams=3,  # Number of beams for beam search
         gru_input_size=128,  # Size of the input for the GRU (e.g., number of features in the time series)
+        llm="gpt2",  # Name or path of the pretrained GPT decoder
+        loss_chunk_size=128,  # Positions whose vocabulary logits are materialized at once by the teacher forced loss
+        vocab_subset=None,  # VocabSubset (or path to its JSON) restricting the loss and the decoding to the summary tokens
         **kwargs
     ):
-        super(GRUGPTModel).__init__(
+        super().__init__(
             random_seed=random_seed,
             loss=loss,
             tokenizer=tokenizer,
@@ -47,6 +69,7 @@ class GRUGPTModel(BaseModel):
 
         self.tokenizer = tokenizer
         self.max_length = max_length
+        self.num_beams = num_beams
 
         # GRU Encoder
         self.gru = nn.GRU(
@@ -56,62 +79,75 @@ class GRUGPTModel(BaseModel):
             batch_first=True
         )
 
-        # GPT Decoder
-        self.gpt = GPT2LMHeadModel.from_pretrained("gpt2")
-        # Freeze the GPT model parameters
-        for param in self.gpt.parameters():
-            param.requires_grad = False
-
-        # Put the GPT model in evaluation mode
-        self.gpt.eval()  # Ensure GPT is in evaluation mode
+        # GPT Decoder: frozen, in evaluation mode and shared with the other models of the process
+        self.llm_name = llm
+        self.gpt = load_frozen_backbone(llm)
 
         # Mapping GRU hidden state to the GPT's embedding size
         self.hidden_to_gpt = nn.Linear(hidden_size, self.gpt.config.n_embd)
 
         # Learning rate
         self.base_lr = base_lr
+        self.loss_chunk_size = loss_chunk_size
+
+        # Output vocabulary restricted to the tokens of the summaries, scored by a slice of the LM head
+        if isinstance(vocab_subset, str):
+            vocab_subset = VocabSubset.load(vocab_subset)
+        self.vocab_subset = vocab_subset
+        self.subset_head = vocab_subset.slice_lm_head(self.gpt) if vocab_subset is not None else None
 
-    def forward(self, batch, targets=None, use_teacher_forcing=False):
+    def forward(self, batch, targets=None, teacher_forcing=False):
         """
         Forward pass of the model.
         - time_series: Time series input (batch_size, seq_length, num_features)
         - targets: Target text used for teacher forcing (optional)
-        - use_teacher_forcing: Boolean flag for using teacher forcing
+        - teacher_forcing: Boolean flag for using teacher forcing
         Returns:
         - gpt_output.loss if using teacher forcing
-        - gpt_output logits if autoregressive generation
+        - gpt_output logits if autoregressive generation (over the subset ids with `vocab_subset`)
         """
         inputs = {key: batch[key] for key in self.input_keys}
         time_series = inputs['temporal_series']
 
-        # GRU encoding
-        _, hidden_state = self.gru(time_series)
-        hidden_state = hidden_state[-1]
+        with stage('encoder'):
+            # GRU encoding
+            _, hidden_state = self.gru(time_series)
+            hidden_state = hidden_state[-1]
 
-        # Map hidden state to GPT's input size (this is the time series representation)
-        gpt_input = self.hidden_to_gpt(hidden_state).unsqueeze(1)  # (batch_size, 1, gpt_hidden_size)
+            # Map hidden state to GPT's input size (this is the time series representation)
+            gpt_input = self.hidden_to_gpt(hidden_state).unsqueeze(1)  # (batch_size, 1, gpt_hidden_size)
 
-        if use_teacher_forcing and targets is not None:
+        if teacher_forcing and targets is not None:
             # Teacher forcing: pass inputs and labels to GPT for loss computation
             gpt_input_ids = targets[:, :-1]  # Input part of the target sequence (ignore last token)
             token_embeddings = self.gpt.transformer.wte(gpt_input_ids)
             gpt_input_combined = torch.cat([gpt_input, token_embeddings], dim=1)
             
-            # Pass to GPT and compute loss directly
-            gpt_output = self.gpt(inputs_embeds=gpt_input_combined, labels=targets)
-            return gpt_output.loss
+            # Each position predicts the next target token (the shift of the GPT loss), with the
+            # LM head evaluated chunk by chunk instead of over the whole vocabulary × sequence
+            with stage('llm'):
+                hidden_states = self.gpt.base_model(inputs_embeds=gpt_input_combined, use_cache=False).last_hidden_state
+            with stage('loss'):
+                if self.vocab_subset is None:
+                    return chunked_lm_loss(self.gpt, hidden_states[:, :-1], targets[:, 1:], chunk_size=self.loss_chunk_size)
+                # Tokens outside the subset cannot be predicted and are left out of the loss
+                return chunked_lm_loss(self.subset_head, hidden_states[:, :-1], self.vocab_subset.to_subset(targets[:, 1:]),
+                                       chunk_size=self.loss_chunk_size)
 
         else:
             # Autoregressive generation with past_key_values management
             outputs = []
+            lm_head = self.subset_head if self.vocab_subset is not None else self.gpt.get_output_embeddings()
 
             for _ in range(self.max_length):
                 # Generate the next token with time series embedding (gpt_input) and past_key_values
-                gpt_output = self.gpt(inputs_embeds=gpt_input)
-                logits = gpt_output.logits[:, -1, :]
+                hidden_states = self.gpt.base_model(inputs_embeds=gpt_input).last_hidden_state
+                logits = lm_head(hidden_states[:, -1, :])
                 outputs.append(logits.unsqueeze(1))
 
                 next_token = torch.argmax(logits, dim=-1)
+                if self.vocab_subset is not None:
+                    next_token = self.vocab_subset.to_vocab(next_token)
                 gpt_input = self.gpt.transformer.wte(next_token).unsqueeze(1)
 
             outputs = torch.cat(outputs, dim=1)  # Concatenate the outputs along sequence dimension
@@ -139,7 +175,7 @@ class GRUGPTModel(BaseModel):
       inputs_embeds = gpt_input.unsqueeze(1)  # (batch_size, 1, hidden_dim)
 
       # Generate text using the built-in generate() function from transformers
-      generated_ids = self.gpt.generate(
+      generated_ids = self._decoding_lm().generate(
           inputs_embeds=inputs_embeds,  # Use the hidden state as input embeddings
           max_length=max_length,
           num_beams=num_beams,
@@ -152,6 +188,56 @@ class GRUGPTModel(BaseModel):
 
       return generated_text
 
+    def _decoding_lm(self):
+        # With a vocabulary subset, beam search runs on a view of the GPT whose LM head only scores the
+        # subset rows; the shared backbone itself is left untouched
+        if self.vocab_subset is None:
+            return self.gpt
+        lm = copy.copy(self.gpt)
+        lm._modules = dict(lm._modules)
+        lm.set_output_embeddings(_SubsetLogits(self.subset_head, self.vocab_subset))
+        return lm
+
+    def stream_generate(self, time_series, max_new_tokens=None, cancel=None):
+        """
+        Stream the greedy summaries of a batch of time series as they are decoded, see
+        `gen_time_llm.generation.stream_generate`.
+
+        - time_series: Time series input (batch_size, seq_length, num_features)
+        - max_new_tokens: Token limit, shared by the batch or one per sequence (defaults to max_length)
+        - cancel: Optional threading.Event stopping the stream
+        Yields the list of text increments of the batch at every decoding step.
+        """
+        max_new_tokens = max_new_tokens if max_new_tokens is not None else self.max_length
+        with torch.no_grad():
+            inputs_embeds = self.prefix_encoder()(time_series)
+        yield from stream_generate(self.gpt, inputs_embeds, self.tokenizer, max_new_tokens=max_new_tokens, cancel=cancel,
+                                   vocab_subset=self.vocab_subset, lm_head=self.subset_head)
+
+    def generate_summaries(self, batch, max_length=None):
+        """
+        Generate the summaries of a batch, bounded by `max_length` tokens, by default the length of the
+        reference summaries.
+        """
+        max_length = max_length if max_length is not None else batch[self.output_key].size(1)
+        return self.generate(batch['temporal_series'], max_length=max_length, num_beams=self.num_beams)
+
+    def decoder_logits(self, batch):
+        """
+        Teacher forced logits of the GPT decoder, with the targets they are scored against and the
+        ignored target id (the alignment of `forward`), used by `gen_time_llm.distill`.
+        """
+        targets = batch[self.output_key]
+        gpt_input = self.prefix_encoder()(batch['temporal_series'])
+        token_embeddings = self.gpt.get_input_embeddings()(targets[:, :-1])
+        logits = self.gpt(inputs_embeds=torch.cat([gpt_input, token_embeddings], dim=1), use_cache=False).logits
+        return logits[:, :-1], targets[:, 1:], -100
+
+    def prefix_encoder(self):
+        """
+        Standalone time series encoder (GRU + `hidden_to_gpt`), see `gen_time_llm.export`.
+        """
+        return GRUPrefixEncoder(self.gru, self.hidden_to_gpt)
 
     def configure_optimizers(self):
         """
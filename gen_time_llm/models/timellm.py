@@ -0,0 +1,761 @@
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../../nbs/models.timellm.ipynb.
+
+# %% auto 0
+__all__ = ['PROMPT_NUMBER_FORMATS', 'ReplicationPad1d', 'TokenEmbedding', 'PatchEmbedding', 'FlattenHead', 'ReprogrammingLayer',
+           'PromptCompiler', 'TimeLLM']
+
+# %% ../../nbs/models.timellm.ipynb 4
+import logging
+import re
+from collections import deque
+import warnings
+import torch
+import torch.nn as nn
+import math
+from torch.utils.checkpoint import checkpoint
+from ..common._backbones import load_frozen_backbone, activation_checkpointing, chunked_lm_loss
+from ..common._base_model import BaseModel
+from ..common._modules import RevIN
+from ..common._timing import stage
+from ..export import TimeLLMPatchEncoder
+from ..tsdataset import FeatureStatsIndex, VocabSubset
+
+_logger = logging.getLogger(__name__)
+
+# %% ../../nbs/models.timellm.ipynb 6
+class ReplicationPad1d(nn.Module):
+    """
+    ReplicationPad1d
+    """       
+    def __init__(self, padding):
+        super(ReplicationPad1d, self).__init__()
+        self.padding = padding
+
+    def forward(self, input):
+        replicate_padding = input[:, :, -1].unsqueeze(-1).repeat(1, 1, self.padding[-1])
+        output = torch.cat([input, replicate_padding], dim=-1)
+        return output
+    
+class TokenEmbedding(nn.Module):
+    """
+    TokenEmbedding
+    """       
+    def __init__(self, c_in, d_model):
+        super(TokenEmbedding, self).__init__()
+        padding = 1 if torch.__version__ >= '1.5.0' else 2
+        self.tokenConv = nn.Conv1d(in_channels=c_in, out_channels=d_model,
+                                   kernel_size=3, padding=padding, padding_mode='circular', bias=False)
+        for m in self.modules():
+            if isinstance(m, nn.Conv1d):
+                nn.init.kaiming_normal_(
+                    m.weight, mode='fan_in', nonlinearity='leaky_relu')
+
+    def forward(self, x):
+        x = self.tokenConv(x.permute(0, 2, 1)).transpose(1, 2)
+        return x
+    
+class PatchEmbedding(nn.Module):
+    """
+    PatchEmbedding
+    """      
+    def __init__(self, d_model, patch_len, stride, dropout):
+        super(PatchEmbedding, self).__init__()
+        # Patching
+        self.patch_len = patch_len
+        self.stride = stride
+        self.padding_patch_layer = ReplicationPad1d((0, stride))
+
+        # Backbone, Input encoding: projection of feature vectors onto a d-dim vector space
+        self.value_embedding = TokenEmbedding(patch_len, d_model)
+
+        # Positional embedding
+        # self.position_embedding = PositionalEmbedding(d_model)
+
+        # Residual dropout
+        self.dropout = nn.Dropout(dropout)
+
+    def forward(self, x):
+        # do patching
+        n_vars = x.shape[1]
+        x = self.padding_patch_layer(x)
+        if torch.onnx.is_in_onnx_export():
+            # ONNX cannot unfold a dimension of dynamic size, the patches are gathered instead
+            n_patches = (x.shape[-1] - self.patch_len) // self.stride + 1
+            index = torch.arange(n_patches).unsqueeze(1) * self.stride + torch.arange(self.patch_len)
+            x = x[:, :, index]
+        else:
+            x = x.unfold(dimension=-1, size=self.patch_len, step=self.stride)
+        x = torch.reshape(x, (x.shape[0] * x.shape[1], x.shape[2], x.shape[3]))
+        # Input encoding
+        x = self.value_embedding(x)
+        return self.dropout(x), n_vars
+    
+class FlattenHead(nn.Module):
+    """
+    FlattenHead
+    """       
+    def __init__(self, n_vars, nf, target_window, head_dropout=0):
+        super().__init__()
+        self.n_vars = n_vars
+        self.flatten = nn.Flatten(start_dim=-2)
+        self.linear = nn.Linear(nf, target_window)
+        self.dropout = nn.Dropout(head_dropout)
+
+    def forward(self, x):
+        x = self.flatten(x)
+        x = self.linear(x)
+        x = self.dropout(x)
+        return x
+    
+def _kmeans(x, n_clusters, n_iter=10, seed=0):
+    """
+    Batched k-means of `x` of dim [H,S,E] (one clustering per head).
+    Returns the centroids [H,C,E] and the cluster of every point [H,S].
+    """
+    H, S, E = x.shape
+    generator = torch.Generator().manual_seed(seed)
+    centroids = x[:, torch.randperm(S, generator=generator)[:n_clusters].to(x.device)].clone()
+    for _ in range(n_iter):
+        assignments = torch.cdist(x, centroids).argmin(dim=-1)
+        sums = torch.zeros_like(centroids).scatter_add_(1, assignments.unsqueeze(-1).expand(-1, -1, E), x)
+        counts = torch.zeros(H, n_clusters, dtype=x.dtype, device=x.device).scatter_add_(
+            1, assignments, torch.ones_like(x[..., 0]))
+        # Empty clusters keep their previous centroid
+        centroids = torch.where(counts.unsqueeze(-1) > 0, sums / counts.clamp(min=1).unsqueeze(-1), centroids)
+    return centroids, torch.cdist(x, centroids).argmin(dim=-1)
+
+def _rows_csr(columns, values, n_columns):
+    # Sparse [N,n_columns] matrix with the `values` [N,k] at the `columns` [N,k] of every row
+    N, k = columns.shape
+    crow = torch.arange(0, N * k + 1, k, device=columns.device)
+    return torch.sparse_csr_tensor(crow, columns.reshape(-1), values.reshape(-1), size=(N, n_columns),
+                                   check_invariants=False)
+
+
+class ReprogrammingLayer(nn.Module):
+    """
+    ReprogrammingLayer
+
+    Cross attention from the patches to the text prototypes. With `top_k`, every patch and head
+    attends only to its `top_k` highest scoring prototypes. With `index_clusters`, evaluation uses
+    an approximate nearest neighbour (IVF) index of the prototype keys: the keys are clustered with
+    k-means and only the members of the `index_probes` best scoring clusters are scored, instead of
+    every prototype. In the sparse mode the projected prototypes and the index are cached in
+    evaluation mode (the prototypes are fixed once trained) and dropped when the layer goes back to
+    training.
+    """       
+    def __init__(self, d_model, n_heads, d_keys=None, d_llm=None, attention_dropout=0.1,
+                 top_k=None, index_clusters=None, index_probes=4):
+        super(ReprogrammingLayer, self).__init__()
+
+        d_keys = d_keys or (d_model // n_heads)
+
+        self.query_projection = nn.Linear(d_model, d_keys * n_heads)
+        self.key_projection = nn.Linear(d_llm, d_keys * n_heads)
+        self.value_projection = nn.Linear(d_llm, d_keys * n_heads)
+        self.out_projection = nn.Linear(d_keys * n_heads, d_llm)
+        self.n_heads = n_heads
+        self.dropout = nn.Dropout(attention_dropout)
+
+        self.top_k = top_k
+        self.index_clusters = index_clusters
+        self.index_probes = index_probes
+        self._cache = None
+
+    def train(self, mode=True):
+        # The cached prototypes are only valid while the weights are frozen
+        self._cache = None
+        return super().train(mode)
+
+    def reset_index(self):
+        """Drop the cached prototypes and index, e.g. after changing the weights in evaluation mode."""
+        self._cache = None
+
+    def _prototypes(self, source_embedding, value_embedding):
+        S, _ = source_embedding.shape
+        H = self.n_heads
+        cached = self.top_k is not None and not self.training
+        if cached and self._cache is not None:
+            return self._cache
+        keys = self.key_projection(source_embedding).view(S, H, -1)
+        values = self.value_projection(value_embedding).view(S, H, -1)
+        if not cached:
+            return keys, values, None
+        index = self.build_index(keys.detach()) if self.index_clusters is not None else None
+        self._cache = (keys.detach(), values.detach(), index)
+        return self._cache
+
+    def build_index(self, keys):
+        """
+        IVF index of the prototype keys [S,H,E]: per head, the k-means centroids [H,C,E] and the
+        members of every cluster [H,C,M], padded with -1.
+        """
+        keys = keys.permute(1, 0, 2)
+        H, S, _ = keys.shape
+        centroids, assignments = _kmeans(keys, min(self.index_clusters, S))
+        C = centroids.size(1)
+        clusters, order = assignments.sort(dim=-1)
+        counts = torch.zeros(H, C, dtype=torch.long, device=keys.device).scatter_add_(
+            1, assignments, torch.ones_like(assignments))
+        # Position of every prototype inside its cluster
+        starts = torch.cumsum(counts, dim=-1) - counts
+        rank = torch.arange(S, device=keys.device) - starts.gather(1, clusters)
+        members = torch.full((H, C, int(counts.max())), -1, dtype=torch.long, device=keys.device)
+        members[torch.arange(H, device=keys.device).unsqueeze(-1), clusters, rank] = order
+        return centroids, members
+
+    def forward(self, target_embedding, source_embedding, value_embedding):
+        B, L, _ = target_embedding.shape
+        H = self.n_heads
+
+        target_embedding = self.query_projection(target_embedding).view(B, L, H, -1)
+        source_embedding, value_embedding, index = self._prototypes(source_embedding, value_embedding)
+
+        if self.top_k is None:
+            out = self.reprogramming(target_embedding, source_embedding, value_embedding)
+        else:
+            out = self.sparse_reprogramming(target_embedding, source_embedding, value_embedding, index)
+
+        out = out.reshape(B, L, -1)
+
+        return self.out_projection(out)
+
+    def reprogramming(self, target_embedding, source_embedding, value_embedding):
+        B, L, H, E = target_embedding.shape
+
+        scale = 1. / math.sqrt(E)
+
+        scores = torch.einsum("blhe,she->bhls", target_embedding, source_embedding)
+
+        A = self.dropout(torch.softmax(scale * scores, dim=-1))
+        reprogramming_embedding = torch.einsum("bhls,she->blhe", A, value_embedding)
+
+        return reprogramming_embedding
+
+    def select_prototypes(self, queries, keys, index=None):
+        """
+        Scores and indices [B,H,L,top_k] of the `top_k` prototypes of every query, from the queries
+        [B,H,L,E] and the keys [H,S,E].
+        """
+        B, H, L, E = queries.shape
+        S = keys.size(1)
+        if index is None:
+            return torch.matmul(queries, keys.transpose(1, 2)).topk(min(self.top_k, S), dim=-1)
+
+        # Candidates: the members of the best scoring clusters, scored as a sampled matrix product
+        centroids, members = index
+        probes = torch.matmul(queries, centroids.transpose(1, 2)).topk(
+            min(self.index_probes, centroids.size(1)), dim=-1).indices
+        candidates = members[torch.arange(H, device=keys.device).view(1, H, 1, 1), probes].flatten(-2)
+        if candidates.size(-1) >= S:
+            # As many candidates (with padding) as prototypes: scoring them all is cheaper
+            scores = torch.matmul(queries, keys.transpose(1, 2)).gather(-1, candidates.clamp(min=0))
+        else:
+            scores = torch.stack([
+                torch.sparse.sampled_addmm(
+                    _rows_csr(candidates[:, h].reshape(B * L, -1).clamp(min=0),
+                              queries.new_zeros(candidates[:, h].numel()), S),
+                    queries[:, h].reshape(B * L, E), keys[h].t()).values().view(B, L, -1)
+                for h in range(H)
+            ], dim=1)
+        scores = scores.masked_fill(candidates < 0, float('-inf'))
+        scores, best = scores.topk(min(self.top_k, scores.size(-1)), dim=-1)
+        return scores, candidates.gather(-1, best).clamp(min=0)
+
+    def sparse_reprogramming(self, target_embedding, source_embedding, value_embedding, index=None):
+        B, L, H, E = target_embedding.shape
+        scale = 1. / math.sqrt(E)
+        queries = target_embedding.permute(0, 2, 1, 3)  # [B,H,L,E]
+        values = value_embedding.permute(1, 0, 2)  # [H,S,E]
+
+        scores, candidates = self.select_prototypes(queries, source_embedding.permute(1, 0, 2), index)
+        A = self.dropout(torch.softmax(scale * scores, dim=-1))
+
+        if torch.is_grad_enabled() and (A.requires_grad or values.requires_grad):
+            heads = torch.arange(H, device=values.device).view(1, H, 1, 1)
+            reprogramming_embedding = torch.einsum("bhlk,bhlke->bhle", A, values[heads, candidates])
+        else:
+            # Inference: sparse [B*L,S] x [S,E] product per head, without gathering the values
+            reprogramming_embedding = torch.stack([
+                torch.matmul(_rows_csr(candidates[:, h].reshape(B * L, -1), A[:, h].reshape(B * L, -1),
+                                       values.size(1)), values[h]).view(B, L, -1)
+                for h in range(H)
+            ], dim=1)
+        return reprogramming_embedding.permute(0, 2, 1, 3)
+
+# %% ../../nbs/models.timellm.ipynb 9
+PROMPT_NUMBER_FORMATS = ['g', 'e']
+
+class PromptCompiler:
+    """
+    PromptCompiler
+
+    Builds the TimeLLM prompt from per-feature statistics. Numbers are written with `precision`
+    significant digits, either in general (`'g'`) or scientific (`'e'`) notation, and feature names
+    can be abbreviated. When `max_tokens` is set, features are dropped from the end of the
+    (priority ordered) feature list until the tokenized prompt fits in the budget.
+    """
+    feature_template = ("Feature {name} statistics: min value {min}, max value {max}, "
+                        "median value {median}, the trend is {trend}")
+    footer = "<||>"
+    stopwords = {'a', 'an', 'and', 'as', 'at', 'by', 'for', 'in', 'is', 'of', 'on', 'or', 'part', 'that', 'the', 'to'}
+
+    def __init__(self, tokenizer, max_tokens=None, precision=3, number_format='g',
+                 abbreviate=True, word_length=4, max_name_length=24, abbreviations=None, history=1024):
+        """
+        :param tokenizer: tokenizer of the LLM, used to measure prompt lengths
+        :param max_tokens: hard token budget of a single prompt (None disables the budget)
+        :param precision: number of significant digits of the statistics
+        :param number_format: 'g' for general notation, 'e' for scientific notation
+        :param abbreviate: if True, feature names are shortened word by word
+        :param word_length: number of characters kept from each word of an abbreviated name
+        :param max_name_length: maximum length of an abbreviated name
+        :param abbreviations: optional mapping from feature name to the name used in the prompt
+        :param history: number of recent prompts whose lengths and dropped features are kept
+        """
+        assert number_format in PROMPT_NUMBER_FORMATS, f'{number_format} is not in {PROMPT_NUMBER_FORMATS}'
+        self.tokenizer = tokenizer
+        self.max_tokens = max_tokens
+        self.precision = precision
+        self.number_format = number_format
+        self.abbreviate = abbreviate
+        self.word_length = word_length
+        self.max_name_length = max_name_length
+        self.abbreviations = dict(abbreviations) if abbreviations is not None else {}
+        self._names = {}
+        self.history = history
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.n_prompts = 0
+        self.total_tokens = 0
+        self.max_prompt_tokens = 0
+        self.dropped_features = 0
+        self.last_lengths = deque(maxlen=self.history)
+        self.last_dropped = deque(maxlen=self.history)
+
+    @property
+    def mean_prompt_tokens(self):
+        return self.total_tokens / max(self.n_prompts, 1)
+
+    def format_number(self, value):
+        if self.number_format == 'e':
+            return f"{value:.{max(self.precision - 1, 0)}e}"
+        return f"{value:.{self.precision}g}"
+
+    def feature_name(self, name):
+        if name in self.abbreviations:
+            return self.abbreviations[name]
+        if not self.abbreviate:
+            return name
+        if name not in self._names:
+            words = [w for w in re.split(r'_+', name) if w and w not in self.stopwords]
+            self._names[name] = '_'.join(w[:self.word_length] for w in words)[:self.max_name_length] or name
+        return self._names[name]
+
+    def feature_prompt(self, name, min_value, max_value, median_value, trend):
+        return self.feature_template.format(
+            name=self.feature_name(name),
+            min=self.format_number(min_value),
+            max=self.format_number(max_value),
+            median=self.format_number(median_value),
+            trend='upward' if trend > 0 else 'downward',
+        )
+
+    def header(self, country, sectors):
+        return (
+            f"<|start_prompt|>Focused country: {country}, sectors: {', '.join(sectors)} "
+            f"Task description: generate climate policy summary according to the given information; "
+        )
+
+    def count_tokens(self, texts):
+        return [len(ids) for ids in self.tokenizer(texts, add_special_tokens=False)['input_ids']]
+
+    def compile(self, country, sectors, feature_prompts, max_tokens=None):
+        """
+        Join the header and the feature prompts, given in decreasing priority. The lowest
+        priority features are dropped first when the prompt does not fit in `max_tokens`.
+        """
+        max_tokens = max_tokens if max_tokens is not None else self.max_tokens
+        header = self.header(country, sectors)
+        keep = len(feature_prompts)
+
+        if max_tokens is not None and keep > 0:
+            # Estimate from per-feature lengths, then correct with the exact length below
+            fixed, *lengths = self.count_tokens([header + self.footer] + [' ' + p for p in feature_prompts])
+            while keep > 0 and fixed + sum(lengths[:keep]) > max_tokens:
+                keep -= 1
+
+        prompt = f"{header}{' '.join(feature_prompts[:keep])}{self.footer}"
+        n_tokens = self.count_tokens([prompt])[0]
+        while max_tokens is not None and keep > 0 and n_tokens > max_tokens:
+            keep -= 1
+            prompt = f"{header}{' '.join(feature_prompts[:keep])}{self.footer}"
+            n_tokens = self.count_tokens([prompt])[0]
+
+        self._record(n_tokens, len(feature_prompts) - keep)
+        return prompt
+
+    def _record(self, n_tokens, n_dropped):
+        self.n_prompts += 1
+        self.total_tokens += n_tokens
+        self.max_prompt_tokens = max(self.max_prompt_tokens, n_tokens)
+        self.dropped_features += n_dropped
+        self.last_lengths.append(n_tokens)
+        self.last_dropped.append(n_dropped)
+        _logger.debug("prompt tokens: %d, dropped features: %d", n_tokens, n_dropped)
+
+# %% ../../nbs/models.timellm.ipynb 12
+class TimeLLM(BaseModel):
+
+    """ TimeLLM
+
+    Time-LLM is a reprogramming framework to repurpose an off-the-shelf LLM for time series forecasting.
+
+    It trains a reprogramming layer that translates the observed series into a language task. This is fed to the LLM and an output
+    projection layer translates the output back to numerical predictions.
+    """
+
+    frozen_modules = ('llm', 'llm_head')
+    pretrained_modules = ('llm', 'llm_head', 'subset_head')
+
+    def __init__(
+        self,
+        random_seed,
+        input_size,
+        patch_len: int = 4,
+        stride: int = 2,
+        d_ff: int = 128,
+        top_k: int = 5,
+        d_llm: int = 768,
+        d_model: int = 32,
+        n_heads: int = 8,
+        enc_in: int = 7,
+        dec_in: int  = 7,
+        llm = None,
+        llm_config = None,
+        llm_tokenizer = None,
+        llm_num_hidden_layers = 32,
+        llm_output_attention: bool = True,
+        llm_output_hidden_states: bool = True,
+        dropout=0.1,
+        base_lr=1e-5,  # Learning rate
+        max_length=512,  # Maximum length of generated sequences
+        num_beams=3,  # Number of beams for beam search
+        max_prompt_tokens=None,  # Token budget of the prompt (defaults to the LLM context left by the patches)
+        prompt_precision: int = 3,  # Significant digits of the prompt statistics
+        prompt_number_format: str = 'g',  # 'g' (general) or 'e' (scientific) notation
+        abbreviate_features: bool = True,  # Abbreviate feature names in the prompt
+        feature_abbreviations=None,  # Optional mapping from feature name to prompt name
+        feature_stats=None,  # FeatureStatsIndex (or path to its JSON) for a fixed, dataset-level feature selection
+        num_tokens: int = 1024,  # Number of text prototypes
+        prototype_top_k=None,  # Attend only to the top k prototypes of every patch (None for dense attention)
+        prototype_index_clusters=None,  # Clusters of the approximate prototype index used in evaluation (None disables it)
+        prototype_index_probes: int = 4,  # Clusters searched per query in the prototype index
+        checkpoint_llm: bool = False,  # Recompute the LLM block activations in the backward pass instead of keeping them
+        checkpoint_reprogramming: bool = False,  # Recompute the reprogramming attention in the backward pass
+        loss_chunk_size: int = 128,  # Positions whose vocabulary logits are materialized at once by the loss
+        vocab_subset=None,  # VocabSubset (or path to its JSON) restricting the prototypes and the output vocabulary to the summary tokens
+        **kwargs
+    ):
+        super().__init__(
+            random_seed=random_seed,
+            max_length=max_length,
+            num_beams=num_beams,
+            **kwargs
+        )
+
+        self.base_lr = base_lr
+        self.max_length = max_length
+
+        self.patch_len = patch_len
+        self.stride = stride
+        self.d_ff = d_ff
+        self.top_k = top_k
+        self.d_llm = d_llm
+        self.d_model = d_model
+        self.dropout = dropout
+        self.n_heads = n_heads
+        self.enc_in = enc_in
+        self.dec_in = dec_in
+
+        DEFAULT_MODEL = "openai-community/gpt2"
+
+        if llm is None:
+            print(f"Using {DEFAULT_MODEL} as default.")
+            model_name = DEFAULT_MODEL
+        else:
+            model_name = llm
+
+        if llm_config is not None or llm_tokenizer is not None:
+            warnings.warn("'llm_config' and 'llm_tokenizer' parameters are deprecated and will be ignored. "
+                        "The config and tokenizer will be automatically loaded from the specified model.", 
+                        DeprecationWarning)
+
+        # transformers is imported here to keep the module import light
+        from transformers import AutoTokenizer
+
+        # The frozen LM is shared with the other models of the process and `llm` is its
+        # transformer body, so the weights are loaded once
+        try:
+            self.llm_head = load_frozen_backbone(model_name)
+            self.llm_tokenizer = AutoTokenizer.from_pretrained(model_name)
+            print(f"Successfully loaded model: {model_name}")
+        except EnvironmentError:
+            print(f"Failed to load {model_name}. Loading the default model ({DEFAULT_MODEL})...")
+            model_name = DEFAULT_MODEL
+            self.llm_head = load_frozen_backbone(model_name)
+            self.llm_tokenizer = AutoTokenizer.from_pretrained(model_name)
+        self.llm_name = model_name
+        self.llm = self.llm_head.base_model
+        self.llm_config = self.llm_head.config
+
+        self.llm_num_hidden_layers = llm_num_hidden_layers
+        self.llm_output_attention = llm_output_attention
+        self.llm_output_hidden_states = llm_output_hidden_states
+
+        if self.llm_tokenizer.eos_token:
+            self.llm_tokenizer.pad_token = self.llm_tokenizer.eos_token
+        else:
+            pad_token = '[PAD]'
+            self.llm_tokenizer.add_special_tokens({'pad_token': pad_token})
+            self.llm_tokenizer.pad_token = pad_token
+
+        self.patch_embedding = PatchEmbedding(
+            self.d_model, self.patch_len, self.stride, self.dropout)
+        
+        # The word embeddings are read from the backbone when needed, never registered here,
+        # so slim checkpoints do not carry the vocab x d_llm table
+        self.vocab_size = self.llm.get_input_embeddings().weight.shape[0]
+        self.num_tokens = num_tokens
+
+        # With a vocabulary subset, the prototypes are mapped from the subset words only
+        if isinstance(vocab_subset, str):
+            vocab_subset = VocabSubset.load(vocab_subset)
+        self.vocab_subset = vocab_subset
+        n_words = len(vocab_subset) if vocab_subset is not None else self.vocab_size
+        self.mapping_layer = nn.Linear(n_words, self.num_tokens)
+
+        self.reprogramming_layer = ReprogrammingLayer(
+            self.d_model, self.n_heads, self.d_ff, self.d_llm, top_k=prototype_top_k,
+            index_clusters=prototype_index_clusters, index_probes=prototype_index_probes)
+
+        # Activation checkpointing trades recomputation for training memory
+        self.checkpoint_llm = checkpoint_llm
+        self.checkpoint_reprogramming = checkpoint_reprogramming
+        self.loss_chunk_size = loss_chunk_size
+
+        self.patch_nums = int((input_size - self.patch_len) / self.stride + 2)
+        self.normalize_layers = RevIN(self.enc_in, affine=False)
+        self.n_selected_features = 10
+
+        # Dataset-level feature selection, computed once per set of columns
+        if isinstance(feature_stats, str):
+            feature_stats = FeatureStatsIndex.load(feature_stats)
+        self.feature_stats = feature_stats
+        self._selected_features = {}
+
+        self.llm_context_length = getattr(self.llm_config, 'n_positions', None) or \
+            getattr(self.llm_config, 'max_position_embeddings', 1024)
+        self.max_prompt_tokens = max_prompt_tokens
+        self.prompt_compiler = PromptCompiler(
+            self.llm_tokenizer,
+            precision=prompt_precision,
+            number_format=prompt_number_format,
+            abbreviate=abbreviate_features,
+            abbreviations=feature_abbreviations,
+        )
+
+        # Output vocabulary restricted to the subset, scored by a slice of the LM head
+        self.subset_head = vocab_subset.slice_lm_head(self.llm_head) if vocab_subset is not None else None
+
+    def select_top_features_by_variance(self, time_series, top_k=20):
+        # time_series is assumed to be of shape (B, T, N)
+        # Compute variance for each feature over time (dim=1 -> T)
+        feature_variances = torch.var(time_series, dim=1).mean(dim=0)  # Mean variance per feature across batches
+        
+        # Get indices of the top `top_k` features by variance
+        top_features = torch.topk(feature_variances, top_k).indices
+        return top_features
+
+    def select_features(self, x_enc, columns):
+        """
+        Indices of the features fed to the LLM: the columns with the largest dataset variance when
+        `feature_stats` is set (stable across batches), otherwise the largest variance of the batch.
+        """
+        if self.feature_stats is None:
+            return self.select_top_features_by_variance(x_enc, top_k=self.n_selected_features)
+        key = tuple(columns)
+        if key not in self._selected_features:
+            self._selected_features[key] = torch.tensor(self.feature_stats.top_k(columns, self.n_selected_features))
+        return self._selected_features[key].to(x_enc.device)
+
+    def source_embeddings(self):
+        """
+        Text prototypes [num_tokens,d_llm]: the word embeddings of the vocabulary (or of its subset)
+        linearly mapped to `num_tokens` embeddings.
+        """
+        word_embeddings = self.llm.get_input_embeddings().weight
+        if self.vocab_subset is not None:
+            word_embeddings = word_embeddings[self.vocab_subset.token_ids.to(word_embeddings.device)]
+        return self.mapping_layer(word_embeddings.permute(1, 0).to(self.mapping_layer.weight.dtype)).permute(1, 0)
+
+    def _load_from_state_dict(self, state_dict, prefix, *args, **kwargs):
+        # Older checkpoints registered the backbone word embeddings on the model itself
+        state_dict.pop(prefix + 'word_embeddings', None)
+        super()._load_from_state_dict(state_dict, prefix, *args, **kwargs)
+
+    def encode(self, time_series, country, sector, columns):
+        with stage('encoder'):
+            # Stateless normalization, so one model can encode concurrent batches
+            x_enc, _ = self.normalize_layers.norm(time_series)
+
+            # Select top 10 important features
+            selected_features = self.select_features(x_enc, columns)
+
+            # Select the corresponding column names for the selected features
+            selected_columns = [columns[i] for i in selected_features.tolist()]
+
+            # Select only the top 10 important features
+            x_enc = x_enc[:, :, selected_features]  # Shape will be (B, T, 10)
+
+        B, T, N = x_enc.size()
+
+        with stage('prompt'):
+            min_values = torch.min(x_enc, dim=1)[0].tolist()  # Min over time (T) for each feature (N)
+            max_values = torch.max(x_enc, dim=1)[0].tolist()  # Max over time (T) for each feature (N)
+            medians = torch.median(x_enc, dim=1).values.tolist()  # Median over time (T) for each feature (N)
+            trends = x_enc.diff(dim=1).sum(dim=1).tolist()  # Sum of differences over time (T) for each feature (N)
+
+            # The prompt has to share the LLM context with the N * n_patches patch tokens
+            n_patches = (T + self.stride - self.patch_len) // self.stride + 1
+            prompt_budget = self.llm_context_length - N * n_patches
+            if self.max_prompt_tokens is not None:
+                prompt_budget = min(prompt_budget, self.max_prompt_tokens)
+            if prompt_budget < 1:
+                warnings.warn(f"The {N * n_patches} patch tokens fill the LLM context of {self.llm_context_length} tokens; "
+                              "the prompt is truncated to a single token.")
+                prompt_budget = 1
+
+            prompt, lengths, dropped = [], [], []
+            for b in range(B):
+                # Features are ordered by decreasing variance, so the least informative ones are dropped first
+                feature_prompts = [
+                    self.prompt_compiler.feature_prompt(selected_columns[n], min_values[b][n], max_values[b][n],
+                                                        medians[b][n], trends[b][n])
+                    for n in range(N)
+                ]
+                prompt.append(self.prompt_compiler.compile(country[b], sector[b], feature_prompts, max_tokens=prompt_budget))
+                lengths.append(self.prompt_compiler.last_lengths[-1])
+                dropped.append(self.prompt_compiler.last_dropped[-1])
+            # Prompt budgeting of the last batch, logged by `forward`
+            self.prompt_stats = dict(prompt_tokens_mean=sum(lengths) / B, prompt_tokens_max=max(lengths),
+                                     prompt_dropped_features=sum(dropped))
+
+            # The prompts are measured without special tokens, they are tokenized the same way
+            prompt = self.llm_tokenizer(prompt, return_tensors="pt", padding=True, truncation=True, max_length=prompt_budget,
+                                        add_special_tokens=False).input_ids
+            prompt_embeddings = self.llm.get_input_embeddings()(prompt.to(x_enc.device))  # (batch, prompt_token, dim)
+
+        with stage('encoder'):
+            source_embeddings = self.source_embeddings()
+
+            x_enc = x_enc.permute(0, 2, 1).contiguous()
+            enc_out, n_vars = self.patch_embedding(x_enc.to(torch.float32))
+            if self.checkpoint_reprogramming and torch.is_grad_enabled():
+                enc_out = checkpoint(self.reprogramming_layer, enc_out, source_embeddings, source_embeddings,
+                                     use_reentrant=False)
+            else:
+                enc_out = self.reprogramming_layer(enc_out, source_embeddings, source_embeddings)
+        H_enc = enc_out.size(2)
+        enc_out = enc_out.view(B, -1, H_enc)  # torch.Size([4, 50, 768])
+        llm_enc_out = torch.cat([prompt_embeddings, enc_out], dim=1)
+
+        return llm_enc_out
+
+
+    def forward(self, batch, target, teacher_forcing=True):
+        output = self.encode(batch['temporal_series'], batch['country'], batch['sector'], batch['temporal_cols'])
+        if self._trainer is not None:
+            phase = 'train' if self.training else 'val'
+            for name, value in self.prompt_stats.items():
+                self.log(f"{phase}_{name}", float(value), batch_size=output.size(0))
+        with stage('llm'), activation_checkpointing(self.llm_head, self.checkpoint_llm):
+            hidden_states = self.llm(inputs_embeds=output, use_cache=False).last_hidden_state
+
+        # The output positions are aligned with the target: extra positions are dropped and missing
+        # ones score zero logits. The LM head and the cross-entropy run chunk by chunk, so the
+        # logits of the whole sequence are never materialized.
+        with stage('loss'):
+            if self.vocab_subset is None:
+                loss = chunked_lm_loss(self.llm_head, hidden_states, target,
+                                       ignore_index=self.llm_tokenizer.eos_token_id, chunk_size=self.loss_chunk_size)
+            else:
+                # Tokens outside the subset cannot be predicted and are left out of the loss, like the padding
+                eos_token_id = int(self.vocab_subset.index[self.llm_tokenizer.eos_token_id])
+                loss = chunked_lm_loss(self.subset_head, hidden_states, self.vocab_subset.to_subset(target, unknown=eos_token_id),
+                                       ignore_index=eos_token_id, chunk_size=self.loss_chunk_size)
+
+        return loss
+
+
+    @torch.no_grad()
+    def generate_summaries(self, batch, max_length=None):
+        """
+        Decode the summaries of a batch: the output positions of the LLM are aligned with the summary
+        tokens (see `forward`), so the greedy tokens are read off a single forward pass. The summaries
+        are bounded by `max_length` tokens, by default the length of the reference summaries.
+        """
+        max_length = max_length if max_length is not None else batch[self.output_key].size(1)
+        output = self.encode(batch['temporal_series'], batch['country'], batch['sector'], batch['temporal_cols'])
+        hidden_states = self.llm(inputs_embeds=output, use_cache=False).last_hidden_state
+        hidden_states = hidden_states[:, :max_length]
+        if self.vocab_subset is None:
+            token_ids = self.llm_head.get_output_embeddings()(hidden_states).argmax(dim=-1)
+        else:
+            token_ids = self.vocab_subset.to_vocab(self.subset_head(hidden_states).argmax(dim=-1))
+        return self.llm_tokenizer.batch_decode(token_ids, skip_special_tokens=True)
+
+    def decoder_logits(self, batch):
+        """
+        Logits of the LLM over the target positions, with the targets they are scored against and
+        the ignored target id (the alignment of `forward`, over the subset ids with `vocab_subset`),
+        used by `gen_time_llm.distill`.
+        """
+        output = self.encode(batch['temporal_series'], batch['country'], batch['sector'], batch['temporal_cols'])
+        hidden_states = self.llm(inputs_embeds=output, use_cache=False).last_hidden_state
+        target = batch[self.output_key][:, :hidden_states.size(1)]
+        hidden_states = hidden_states[:, :target.size(1)]
+        ignore_index = self.llm_tokenizer.eos_token_id
+        if self.vocab_subset is None:
+            return self.llm_head.get_output_embeddings()(hidden_states), target, ignore_index
+        ignore_index = int(self.vocab_subset.index[ignore_index])
+        return self.subset_head(hidden_states), self.vocab_subset.to_subset(target, unknown=ignore_index), ignore_index
+
+    def reference_summaries(self, batch):
+        """
+        Decode the reference summaries of a batch.
+        """
+        return self.llm_tokenizer.batch_decode(batch[self.output_key], skip_special_tokens=True)
+
+    @torch.no_grad()
+    def prefix_encoder(self, columns=None):
+        """
+        Standalone numerical encoder (RevIN + PatchEmbedding + ReprogrammingLayer) with the current
+        text prototypes frozen in, see `gen_time_llm.export`. With `feature_stats` and the `columns`
+        of the inputs, the dataset-level feature selection is frozen in as well.
+        """
+        source_embeddings = self.source_embeddings()
+        selected_features = None
+        if self.feature_stats is not None and columns is not None:
+            selected_features = self.select_features(source_embeddings, columns)
+        return TimeLLMPatchEncoder(self.normalize_layers, self.patch_embedding, self.reprogramming_layer,
+                                   source_embeddings, top_k=self.n_selected_features,
+                                   selected_features=selected_features)
+
+    def configure_optimizers(self):
+        """
+        Configure optimizers and learning rate scheduler.
+        """
+        optimizer = torch.optim.AdamW(self.parameters(), lr=self.base_lr)
+        return optimizer
@@ -0,0 +1,152 @@
+"""Summarize sharded JSONL files offline with a trained checkpoint"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/predict.ipynb.
+
+# %% auto 0
+__all__ = ['predict_shard', 'predict', 'main']
+
+# %% ../nbs/predict.ipynb 4
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pytorch_lightning as pl
+from pytorch_lightning.callbacks import BasePredictionWriter
+from torch.utils.data import Subset
+
+from .evaluation import load_model
+from .tsdataset import TimeSeriesDataset, TimeSeriesLoader
+
+# %% ../nbs/predict.ipynb 6
+class _ShardWriter(BasePredictionWriter):
+    # Appends the summaries of the batches, in order, and records the progress after each flush
+    def __init__(self, output_path, progress_path, start, offset, n_records, flush_every=64):
+        super().__init__(write_interval='batch')
+        self.output_path, self.progress_path = output_path, progress_path
+        self.index, self.offset, self.n_records = start, offset, n_records
+        self.flush_every = flush_every
+        self._buffer = []
+
+    def on_predict_start(self, trainer, pl_module):
+        # Anything written after the recorded progress belongs to an interrupted run
+        with open(self.output_path, 'a+b') as f:
+            f.truncate(self.offset)
+
+    def write_on_batch_end(self, trainer, pl_module, prediction, batch_indices, batch, batch_idx, dataloader_idx):
+        for i, summary in enumerate(prediction):
+            record = dict(index=self.index, country=batch['country'][i], sector=batch['sector'][i],
+                          year_range=batch['year_range'][i], summary=summary)
+            self._buffer.append(json.dumps(record) + '\n')
+            self.index += 1
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def on_predict_end(self, trainer, pl_module):
+        self.flush()
+
+    def flush(self):
+        with open(self.output_path, 'ab') as f:
+            f.write(''.join(self._buffer).encode())
+            f.flush()
+            os.fsync(f.fileno())
+            self.offset = f.tell()
+        self._buffer = []
+        _write_progress(self.progress_path, dict(records=self.index, offset=self.offset,
+                                                 done=self.index >= self.n_records))
+
+def _write_progress(progress_path, progress):
+    # Atomic, so a killed job never leaves a truncated progress file
+    with open(progress_path + '.tmp', 'w') as f:
+        json.dump(progress, f)
+    os.replace(progress_path + '.tmp', progress_path)
+
+def _read_progress(progress_path):
+    if not os.path.exists(progress_path):
+        return dict(records=0, offset=0, done=False)
+    with open(progress_path) as f:
+        return json.load(f)
+
+def _summary_tokenizer(model):
+    # The tokenizer of the summaries: `tokenizer` of GRUGPTModel, `llm_tokenizer` of TimeLLM
+    return model.llm_tokenizer if hasattr(model, 'llm_tokenizer') else model.tokenizer
+
+# %% ../nbs/predict.ipynb 7
+def predict_shard(model, shard_path, output_dir, batch_size=8, flush_every=64, trainer_kwargs=None):
+    """
+    Summarize the records of the JSONL shard `shard_path` with `model`, resuming after the progress
+    recorded by a previous run.
+
+    **Parameters:**<br>
+    `model`: BaseModel, trained model.<br>
+    `shard_path`: str, JSONL file of the records.<br>
+    `output_dir`: str, directory of the predictions and progress files.<br>
+    `batch_size`: int, records summarized at once.<br>
+    `flush_every`: int, records written between two progress updates.<br>
+    `trainer_kwargs`: dict, extra `pl.Trainer` keyword arguments (e.g. `accelerator`).<br>
+
+    **Returns:**<br>
+    `output_path`: str, JSONL file of the summaries.<br>
+    """
+    name = os.path.splitext(os.path.basename(shard_path))[0]
+    output_path = os.path.join(output_dir, f'{name}.predictions.jsonl')
+    progress_path = os.path.join(output_dir, f'{name}.progress.json')
+    progress = _read_progress(progress_path)
+    if progress['done']:
+        return output_path
+    dataset = TimeSeriesDataset.from_jsonl(shard_path, _summary_tokenizer(model), mode='test')
+    writer = _ShardWriter(output_path, progress_path, progress['records'], progress['offset'], len(dataset),
+                          flush_every=flush_every)
+    loader = TimeSeriesLoader(Subset(dataset, range(progress['records'], len(dataset))), tokenizer=dataset.tokenizer,
+                              batch_size=batch_size, shuffle=False)
+    trainer_kwargs = {**dict(accelerator='cpu', logger=False, enable_checkpointing=False, enable_progress_bar=False,
+                                           enable_model_summary=False),
+                      **(trainer_kwargs or {})}
+    trainer = pl.Trainer(callbacks=[writer], **trainer_kwargs)
+    trainer.predict(model, dataloaders=loader, return_predictions=False)
+    return output_path
+
+def _predict_shards(checkpoint_path, shard_paths, output_dir, batch_size, flush_every, trainer_kwargs):
+    model = load_model(checkpoint_path)
+    return [predict_shard(model, shard_path, output_dir, batch_size, flush_every, trainer_kwargs)
+            for shard_path in shard_paths]
+
+def predict(checkpoint_path, shard_paths, output_dir, batch_size=8, workers=1, flush_every=64, trainer_kwargs=None):
+    """
+    Summarize the JSONL shards `shard_paths` with the checkpoint `checkpoint_path`, the shards being
+    spread over `workers` processes. Returns the output paths, in the order of the shards.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    workers = max(min(workers, len(shard_paths)), 1)
+    groups = [shard_paths[i::workers] for i in range(workers)]
+    args = (output_dir, batch_size, flush_every, trainer_kwargs)
+    if workers == 1:
+        outputs = [_predict_shards(checkpoint_path, shard_paths, *args)]
+    else:
+        # Spawned workers, torch and the model are not forked
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+            outputs = list(pool.map(_predict_shards, [checkpoint_path] * workers, groups, *[[a] * workers for a in args]))
+    by_shard = {shard: path for group, paths in zip(groups, outputs) for shard, path in zip(group, paths)}
+    return [by_shard[shard] for shard in shard_paths]
+
+# %% ../nbs/predict.ipynb 8
+def main(argv=None):
+    "Entry point of the `gen-time-llm` command."
+    parser = argparse.ArgumentParser(prog='gen-time-llm')
+    commands = parser.add_subparsers(dest='command', required=True)
+    command = commands.add_parser('predict', help='Summarize JSONL shards with a trained checkpoint')
+    command.add_argument('checkpoint', help='Lightning checkpoint of a GRUGPTModel or TimeLLM')
+    command.add_argument('shards', nargs='+', help='JSONL files of the records to summarize')
+    command.add_argument('--output-dir', required=True, help='Directory of the predictions and progress files')
+    command.add_argument('--batch-size', type=int, default=8)
+    command.add_argument('--workers', type=int, default=1, help='Processes the shards are spread over')
+    command.add_argument('--flush-every', type=int, default=64, help='Records written between two progress updates')
+    command.add_argument('--accelerator', default='cpu')
+    command.add_argument('--devices', default='auto')
+    args = parser.parse_args(argv)
+    outputs = predict(args.checkpoint, args.shards, args.output_dir, batch_size=args.batch_size, workers=args.workers,
+                      flush_every=args.flush_every, trainer_kwargs=dict(accelerator=args.accelerator, devices=args.devices))
+    for path in outputs:
+        print(path, file=sys.stdout)
@@ -0,0 +1,288 @@
+"""Memory and throughput measurements of the training step"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/profiling.ipynb.
+
+# %% auto 0
+__all__ = ['ActivationMeter', 'training_step_report', 'StageTimingCallback', 'resident_memory_mb', 'TelemetryCallback']
+
+# %% ../nbs/profiling.ipynb 4
+import json
+import os
+import sys
+import time
+from collections import Counter, defaultdict
+
+import numpy as np
+import pytorch_lightning as pl
+import torch
+
+from .common._timing import (STAGE_TIMINGS_KEY, drain_stage_timings, enable_stage_timing, stage,
+                                          stage_timing_enabled)
+from .tsdataset import BATCH_STATS_KEY, batch_stats_enabled, enable_batch_stats
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# %% ../nbs/profiling.ipynb 6
+class ActivationMeter:
+    """
+    Bytes of the tensors saved for the backward pass by the operations run within the context.
+    Tensors sharing their storage with a parameter of `module` (e.g. transposed weights) and tensors
+    saved several times are counted once or not at all.
+    """
+    def __init__(self, module=None):
+        self.parameters = set() if module is None else {p.untyped_storage().data_ptr() for p in module.parameters()}
+        self.nbytes = 0
+        self._storages = set()
+
+    def _pack(self, tensor):
+        if tensor.layout == torch.strided:
+            storage = tensor.untyped_storage()
+            key = storage.data_ptr()
+            if key not in self.parameters and key not in self._storages:
+                self._storages.add(key)
+                self.nbytes += storage.nbytes()
+        return tensor
+
+    def __enter__(self):
+        self._hooks = torch.autograd.graph.saved_tensors_hooks(self._pack, lambda tensor: tensor)
+        self._hooks.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        self._hooks.__exit__(*exc)
+
+def training_step_report(model, batch, configs, n_repeats=3):
+    """
+    Activation memory and throughput of the training step (forward and backward pass) of `model`
+    on `batch` under each configuration.
+
+    **Parameters:**<br>
+    `model`: BaseModel, model in training mode.<br>
+    `batch`: dict, training batch.<br>
+    `configs`: dict, name of each configuration -> attributes of the model to set, restored afterwards.<br>
+    `n_repeats`: int, timed training steps per configuration.<br>
+
+    **Returns:**<br>
+    `report`: list of dict, with the 'config', the 'activation_mb' saved for the backward pass, the 'step_s' and the 'samples_per_s'.<br>
+    """
+    target = batch[model.output_key]
+    report = []
+    for name, attributes in configs.items():
+        previous = {key: getattr(model, key) for key in attributes}
+        for key, value in attributes.items():
+            setattr(model, key, value)
+        try:
+            with ActivationMeter(model) as meter:
+                loss = model(batch, target, teacher_forcing=True)
+            loss.backward()
+            start = time.perf_counter()
+            for _ in range(n_repeats):
+                model(batch, target, teacher_forcing=True).backward()
+            step = (time.perf_counter() - start) / n_repeats
+        finally:
+            for key, value in previous.items():
+                setattr(model, key, value)
+            model.zero_grad(set_to_none=True)
+        report.append(dict(config=name, activation_mb=meter.nbytes / 2**20, step_s=step,
+                           samples_per_s=target.size(0) / step))
+    return report
+
+# %% ../nbs/profiling.ipynb 7
+class StageTimingCallback(pl.Callback):
+    """
+    Time the stages of the training and validation steps and log the mean and the percentiles of
+    their time per step to the Lightning logger at the end of every epoch, as
+    `{phase}_stage/{stage}_{mean,p50,...}_ms`. The stages of the data loader workers travel with the
+    batches, so they are timed with `num_workers > 0` too. On GPU, the stages time the kernel launches
+    unless `CUDA_LAUNCH_BLOCKING=1`.
+
+    **Parameters:**<br>
+    `trace_path`: str, optional Chrome trace (`chrome://tracing`, Perfetto) of all the timed stages, written at the end of the fit.<br>
+    `percentiles`: tuple of int, percentiles of the stage times logged with the mean.<br>
+    """
+    def __init__(self, trace_path=None, percentiles=(50, 90, 99)):
+        self.trace_path = trace_path
+        self.percentiles = percentiles
+        self.summary = {}
+        self._times = defaultdict(lambda: defaultdict(list))
+        self._trace = []
+
+    def on_fit_start(self, trainer, pl_module):
+        self._was_enabled = stage_timing_enabled()
+        enable_stage_timing()
+        drain_stage_timings()
+        self._times.clear()
+        self._trace = []
+
+    def _batch_start(self, trainer, batch):
+        events = batch.pop(STAGE_TIMINGS_KEY, []) if isinstance(batch, dict) else []
+        self._step_events = list(events) + drain_stage_timings()
+
+    def _batch_end(self, trainer, phase):
+        events = self._step_events + drain_stage_timings()
+        if trainer.sanity_checking:
+            return
+        step = defaultdict(int)
+        for name, start, duration, pid, tid in events:
+            step[name] += duration
+            self._trace.append(dict(name=name, cat=phase, ph='X', ts=start, dur=duration, pid=pid, tid=tid))
+        for name, duration in step.items():
+            self._times[phase][name].append(duration / 1000)
+
+    def _log(self, trainer, phase):
+        stats = {}
+        for name, times in sorted(self._times.pop(phase, {}).items()):
+            stats[f'{phase}_stage/{name}_mean_ms'] = float(np.mean(times))
+            for q, value in zip(self.percentiles, np.percentile(times, self.percentiles)):
+                stats[f'{phase}_stage/{name}_p{q}_ms'] = float(value)
+        if stats:
+            self.summary[phase] = stats
+            if trainer.logger is not None:
+                trainer.logger.log_metrics(stats, step=trainer.global_step)
+
+    def on_train_batch_start(self, trainer, pl_module, batch, batch_idx):
+        self._batch_start(trainer, batch)
+
+    def on_before_backward(self, trainer, pl_module, loss):
+        self._backward = stage('backward')
+        self._backward.__enter__()
+
+    def on_after_backward(self, trainer, pl_module):
+        self._backward.__exit__(None, None, None)
+
+    def on_train_batch_end(self, trainer, pl_module, outputs, batch, batch_idx):
+        self._batch_end(trainer, 'train')
+
+    def on_validation_batch_start(self, trainer, pl_module, batch, batch_idx, dataloader_idx=0):
+        self._batch_start(trainer, batch)
+
+    def on_validation_batch_end(self, trainer, pl_module, outputs, batch, batch_idx, dataloader_idx=0):
+        self._batch_end(trainer, 'val')
+
+    def on_train_epoch_end(self, trainer, pl_module):
+        self._log(trainer, 'train')
+
+    def on_validation_epoch_end(self, trainer, pl_module):
+        self._log(trainer, 'val')
+
+    def on_fit_end(self, trainer, pl_module):
+        enable_stage_timing(self._was_enabled)
+        if self.trace_path is not None:
+            with open(self.trace_path, 'w') as f:
+                json.dump({'traceEvents': self._trace, 'displayTimeUnit': 'ms'}, f)
+
+# %% ../nbs/profiling.ipynb 8
+def resident_memory_mb():
+    """
+    Current and peak resident memory (RSS) of the process in MB, None where the platform does not
+    report them (the current RSS is read from /proc on Linux).
+    """
+    current = peak = None
+    try:
+        with open('/proc/self/statm') as f:
+            current = int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        # ru_maxrss is in KB, in bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / (2**20 if sys.platform == 'darwin' else 2**10)
+    return current, peak
+
+class TelemetryCallback(pl.Callback):
+    """
+    Padding and memory telemetry of the training and validation batches, aggregated per epoch: the
+    real and padded summary tokens and the missing values of the series (from the statistics
+    `TimeSeriesLoader` attaches to the batches while the callback fits), the histograms of the batch
+    shapes and summary lengths, the resident memory of the main process after every step and the peak
+    of the CUDA allocator during the steps on GPU. The scalars are logged to the Lightning logger as
+    `{phase}_telemetry/{metric}`, and the summary of every epoch is kept in `history`.
+
+    **Parameters:**<br>
+    `summary_path`: str, optional JSON file the history is written to at the end of every epoch.<br>
+    """
+    def __init__(self, summary_path=None):
+        self.summary_path = summary_path
+        self.history = []
+        self._epochs = {}
+
+    def on_fit_start(self, trainer, pl_module):
+        self._was_enabled = batch_stats_enabled()
+        enable_batch_stats()
+        self.history = []
+        self._epochs = {}
+
+    def on_fit_end(self, trainer, pl_module):
+        enable_batch_stats(self._was_enabled)
+
+    def _batch_start(self, pl_module, batch):
+        self._stats = batch.pop(BATCH_STATS_KEY, None) if isinstance(batch, dict) else None
+        if pl_module.device.type == 'cuda':
+            torch.cuda.reset_peak_memory_stats(pl_module.device)
+
+    def _batch_end(self, trainer, pl_module, phase):
+        if trainer.sanity_checking:
+            return
+        epoch = self._epochs.setdefault(phase, dict(batches=0, samples=0, summary_tokens=0, summary_padded_tokens=0,
+                                                    series_values=0, series_missing=0, batch_shapes=Counter(),
+                                                    series_shapes=Counter(), summary_lengths=Counter(),
+                                                    step_rss_mb=[], cuda_step_peak_mb=[]))
+        epoch['batches'] += 1
+        stats = self._stats
+        if stats is not None:
+            epoch['samples'] += stats['batch_size']
+            for key in ('summary_tokens', 'summary_padded_tokens', 'series_values', 'series_missing'):
+                epoch[key] += stats[key]
+            max_length = stats['summary_padded_tokens'] // stats['batch_size']
+            epoch['batch_shapes'][f"{stats['batch_size']}x{max_length}"] += 1
+            epoch['series_shapes']['x'.join(map(str, (stats['batch_size'], *stats['series_shape'])))] += 1
+            epoch['summary_lengths'].update(stats['summary_lengths'])
+        rss, _ = resident_memory_mb()
+        if rss is not None:
+            epoch['step_rss_mb'].append(rss)
+        if pl_module.device.type == 'cuda':
+            epoch['cuda_step_peak_mb'].append(torch.cuda.max_memory_allocated(pl_module.device) / 2**20)
+
+    def _summarize(self, trainer, phase):
+        epoch = self._epochs.pop(phase, None)
+        if epoch is None:
+            return
+        summary = dict(phase=phase, epoch=trainer.current_epoch, batches=epoch['batches'], samples=epoch['samples'],
+                       summary_tokens=epoch['summary_tokens'], summary_padded_tokens=epoch['summary_padded_tokens'],
+                       padding_ratio=1 - epoch['summary_tokens'] / max(epoch['summary_padded_tokens'], 1),
+                       series_missing_ratio=epoch['series_missing'] / max(epoch['series_values'], 1),
+                       peak_rss_mb=resident_memory_mb()[1])
+        for key in ('step_rss_mb', 'cuda_step_peak_mb'):
+            if epoch[key]:
+                summary[f'{key}_mean'] = float(np.mean(epoch[key]))
+                summary[f'{key}_max'] = float(np.max(epoch[key]))
+        metrics = {f'{phase}_telemetry/{key}': value for key, value in summary.items()
+                   if key not in ('phase', 'epoch') and value is not None}
+        for key in ('batch_shapes', 'series_shapes', 'summary_lengths'):
+            summary[key] = {str(value): count for value, count in sorted(epoch[key].items())}
+        self.history.append(summary)
+        if trainer.logger is not None:
+            trainer.logger.log_metrics(metrics, step=trainer.global_step)
+        if self.summary_path is not None:
+            with open(self.summary_path, 'w') as f:
+                json.dump(self.history, f, indent=2)
+
+    def on_train_batch_start(self, trainer, pl_module, batch, batch_idx):
+        self._batch_start(pl_module, batch)
+
+    def on_train_batch_end(self, trainer, pl_module, outputs, batch, batch_idx):
+        self._batch_end(trainer, pl_module, 'train')
+
+    def on_validation_batch_start(self, trainer, pl_module, batch, batch_idx, dataloader_idx=0):
+        self._batch_start(pl_module, batch)
+
+    def on_validation_batch_end(self, trainer, pl_module, outputs, batch, batch_idx, dataloader_idx=0):
+        self._batch_end(trainer, pl_module, 'val')
+
+    def on_train_epoch_end(self, trainer, pl_module):
+        self._summarize(trainer, 'train')
+
+    def on_validation_epoch_end(self, trainer, pl_module):
+        self._summarize(trainer, 'val')
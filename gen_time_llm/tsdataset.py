@@ -3,16 +3,39 @@
 # AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/tsdataset.ipynb.
 
 # %% auto 0
-__all__ = ['sector_column_mapping', 'LengthBasedBatchSampler', 'TimeSeriesLoader', 'TimeSeriesDataset', 'TimeSeriesDataModule']
+__all__ = ['BATCH_STATS_KEY', 'sector_column_mapping', 'enable_batch_stats', 'batch_stats_enabled', 'LengthBasedBatchSampler',
+           'TimeSeriesLoader', 'TimeSeriesDataset', 'FeatureStatsIndex', 'VocabSubset']
 
 # %% ../nbs/tsdataset.ipynb 4
+import os
 import warnings
 import re
 import torch
 import json
+from collections import Counter
 from collections.abc import Mapping
 from torch.utils.data import Dataset, DataLoader, Sampler
-import pytorch_lightning as pl
+
+from .common._timing import stage, attach_stage_timings
+
+# Key of the statistics of a collated batch (sizes and padding), read by `gen_time_llm.profiling.TelemetryCallback`
+BATCH_STATS_KEY = '_batch_stats'
+_BATCH_STATS_FLAG = 'GEN_TIME_LLM_BATCH_STATS'
+
+# Like the stage timing, the statistics are off by default and the flag is set in the environment for spawned workers
+_batch_stats_enabled = os.environ.get(_BATCH_STATS_FLAG) == '1'
+
+def enable_batch_stats(enabled=True):
+    """Turn the collation of the batch statistics on or off, in this process and in the processes it starts."""
+    global _batch_stats_enabled
+    _batch_stats_enabled = enabled
+    if enabled:
+        os.environ[_BATCH_STATS_FLAG] = '1'
+    else:
+        os.environ.pop(_BATCH_STATS_FLAG, None)
+
+def batch_stats_enabled():
+    return _batch_stats_enabled
 
 # %% ../nbs/tsdataset.ipynb 5
 class LengthBasedBatchSampler(Sampler):
@@ -21,8 +44,9 @@ class LengthBasedBatchSampler(Sampler):
         self.batch_size = batch_size
         self.sort_key = sort_key
 
-        # Sort indices by the length of `sort_key`
-        self.sorted_indices = sorted(range(len(data_source)), key=lambda i: len(data_source[i][sort_key]))
+        # Sort indices by the length of `sort_key`, the lengths are kept to report the padding of the batches
+        self.lengths = [len(data_source[i][sort_key]) for i in range(len(data_source))]
+        self.sorted_indices = sorted(range(len(data_source)), key=self.lengths.__getitem__)
 
     def __iter__(self):
         # Generate batches from sorted indices
@@ -32,6 +56,19 @@ class LengthBasedBatchSampler(Sampler):
     def __len__(self):
         return (len(self.data_source) + self.batch_size - 1) // self.batch_size
 
+    def padding_stats(self):
+        """
+        Real and padded tokens of `sort_key` over the batches of the sampler (each item is padded to
+        the longest item of its batch by the collate function).
+        """
+        real_tokens = padded_tokens = 0
+        for batch in self:
+            lengths = [self.lengths[i] for i in batch]
+            real_tokens += sum(lengths)
+            padded_tokens += max(lengths) * len(lengths)
+        return dict(n_batches=len(self), real_tokens=real_tokens, padded_tokens=padded_tokens,
+                    padding_ratio=1 - real_tokens / max(padded_tokens, 1))
+
 # %% ../nbs/tsdataset.ipynb 6
 class TimeSeriesLoader(DataLoader):
     """TimeSeriesLoader DataLoader.
@@ -57,7 +94,13 @@ class TimeSeriesLoader(DataLoader):
     def _collate_fn(self, batch):
         """
         Custom collate function to handle time series data and dynamically pad tokenized summaries with `eos_token_id`.
+        When the stage timing is enabled, the timings recorded by the loading process are attached to the batch.
         """
+        with stage('collate'):
+            collated = self._collate(batch)
+        return attach_stage_timings(collated)
+
+    def _collate(self, batch):
         elem = batch[0]
         elem_type = type(elem)
 
@@ -68,13 +111,14 @@ class TimeSeriesLoader(DataLoader):
         # Handle case when the batch is a dictionary
         elif isinstance(elem, Mapping):
             # Collate temporal series (stack 2D time series tensors)
-            temporal_series = self.collate_fn([d['temporal_series'] for d in batch])
+            temporal_series = self._collate([d['temporal_series'] for d in batch])
             
             # Collate sector information (as a list)
             sector = [d['sector'] for d in batch]
             
             # Find the maximum sequence length in the current batch for dynamic padding
-            max_length = max([d['summary_input_ids'].size(0) for d in batch])
+            lengths = [d['summary_input_ids'].size(0) for d in batch]
+            max_length = max(lengths)
             
             # Dynamically pad summaries using eos_token_id
             eos_token_id = self.tokenizer.eos_token_id
@@ -102,7 +146,7 @@ class TimeSeriesLoader(DataLoader):
             col_indices = [d['col_indices'] for d in batch]
 
             # Return the collated batch with dynamic padding for tokenized summaries
-            return dict(
+            collated = dict(
                 temporal_series=temporal_series,
                 sector=sector,
                 summary_input_ids=summary_input_ids,
@@ -112,6 +156,18 @@ class TimeSeriesLoader(DataLoader):
                 year_range=year_range,
                 col_indices=col_indices
             )
+            if _batch_stats_enabled:
+                # The series share the shape of the dataset, their padding is the missing (NaN) values
+                collated[BATCH_STATS_KEY] = dict(
+                    batch_size=len(batch),
+                    summary_lengths=lengths,
+                    summary_tokens=sum(lengths),
+                    summary_padded_tokens=max_length * len(batch),
+                    series_shape=tuple(temporal_series.shape[1:]),
+                    series_values=temporal_series.numel(),
+                    series_missing=int(torch.isnan(temporal_series).sum()),
+                )
+            return collated
 
         # Raise error if an unsupported data type is passed
         raise TypeError(f'Unknown type {elem_type}')
@@ -285,26 +341,33 @@ class TimeSeriesDataset(Dataset):
         Return a single item from the dataset (time series and its metadata).
         The index `idx` specifies which time series entity to retrieve.
         """
+        with stage('getitem'):
+            return self._get_item(idx)
+
+    def _get_item(self, idx):
         data = self.data_list[idx]
         
         # Extract fields from the dictionary
-        temporal_series = torch.tensor(data['positive_time_series'], dtype=torch.float32)
-        anchor_summary = self.clean_text(data['anchor_summary'])
+        with stage('getitem.tensors'):
+            temporal_series = torch.tensor(data['positive_time_series'], dtype=torch.float32)
+        # Records to summarize (prediction) have no reference summary
+        anchor_summary = self.clean_text(data.get('anchor_summary', ''))
         country = data['country']
         columns = data['columns']
         sector_str = data['sector']
         year_range = data['year_range']
 
         # Retrieve column indices related to all sectors in sector_list
-        column_indices = set()
-        for sector in sector_str:
-            sector_columns = sector_column_mapping.get(sector, [])
-            for col in sector_columns:
-                if col in columns:
-                    column_indices.add(columns.index(col))
+        with stage('getitem.columns'):
+            column_indices = set()
+            for sector in sector_str:
+                sector_columns = sector_column_mapping.get(sector, [])
+                for col in sector_columns:
+                    if col in columns:
+                        column_indices.add(columns.index(col))
 
-        # Convert the set of indices to a sorted list
-        column_indices = sorted(list(column_indices))
+            # Convert the set of indices to a sorted list
+            column_indices = sorted(list(column_indices))
 
         # Manually add the BOS and EOS tokens to the input summary
         # bos_token = self.tokenizer.bos_token or self.tokenizer.cls_token  # Default to CLS if BOS isn't defined
@@ -314,12 +377,13 @@ class TimeSeriesDataset(Dataset):
         anchor_summary_with_eos = anchor_summary + " " + eos_token
 
         # Tokenize the summary with the specified tokenizer
-        tokenized_summary = self.tokenizer(
-            anchor_summary_with_eos,
-            max_length=self.max_length,
-            truncation=True,
-            return_tensors='pt'  # Return PyTorch tensors
-        )
+        with stage('getitem.tokenize'):
+            tokenized_summary = self.tokenizer(
+                anchor_summary_with_eos,
+                max_length=self.max_length,
+                truncation=True,
+                return_tensors='pt'  # Return PyTorch tensors
+            )
 
 
         # Extract tokenized input_ids and attention mask (optional)
@@ -387,95 +451,218 @@ class TimeSeriesDataset(Dataset):
             mode=mode
         )
 
-# %% ../nbs/tsdataset.ipynb 12
-class TimeSeriesDataModule(pl.LightningDataModule):
-    
-    def __init__(
-            self, 
-            train_dataset: TimeSeriesDataset,  # Separate dataset for training
-            val_dataset: TimeSeriesDataset,    # Separate dataset for validation
-            tokenizer,                         # Tokenizer for all datasets
-            batch_size=32, 
-            valid_batch_size=8,
-            num_workers=0,
-            drop_last=False,
-            shuffle_train=True,
-            test_dataset: TimeSeriesDataset = None,   # Separate dataset for testing (optional)
-        ):
+# %% ../nbs/tsdataset.ipynb 14
+class FeatureStatsIndex:
+    """
+    Dataset-level statistics of the temporal features, keyed by column name.
+
+    **Parameters:**<br>
+    `stats`: dict, optional, column name to `[count, mean, m2, min, max]` (as saved by `save`).<br>
+    """
+    suffix = '.stats.json'
+
+    def __init__(self, stats=None):
+        self.stats = {name: list(values) for name, values in (stats or {}).items()}
+
+    def update(self, time_series, columns):
+        """Merge the statistics of one series of dim [T,C] with named `columns` into the index."""
+        x = torch.as_tensor(time_series, dtype=torch.float64).reshape(-1, len(columns))
+        observed = ~torch.isnan(x)
+        count = observed.sum(dim=0)
+        mean = torch.where(observed, x, 0.).sum(dim=0) / count.clamp(min=1)
+        m2 = torch.where(observed, (x - mean) ** 2, 0.).sum(dim=0)
+        minimum = torch.where(observed, x, float('inf')).min(dim=0).values
+        maximum = torch.where(observed, x, -float('inf')).max(dim=0).values
+
+        for name, n_b, mean_b, m2_b, min_b, max_b in zip(columns, count.tolist(), mean.tolist(), m2.tolist(),
+                                                         minimum.tolist(), maximum.tolist()):
+            if n_b == 0:
+                continue
+            if name not in self.stats:
+                self.stats[name] = [n_b, mean_b, m2_b, min_b, max_b]
+                continue
+            # Parallel Welford update (Chan et al.)
+            n_a, mean_a, m2_a, min_a, max_a = self.stats[name]
+            n = n_a + n_b
+            delta = mean_b - mean_a
+            self.stats[name] = [n, mean_a + delta * n_b / n, m2_a + m2_b + delta ** 2 * n_a * n_b / n,
+                                min(min_a, min_b), max(max_a, max_b)]
+        return self
+
+    @classmethod
+    def from_records(cls, records):
+        """Build the index from an iterable of records with 'positive_time_series' and 'columns'."""
+        index = cls()
+        for record in records:
+            index.update(record['positive_time_series'], record['columns'])
+        return index
+
+    @classmethod
+    def from_jsonl(cls, file_path, refresh=False):
         """
-        A DataModule for loading time series data, supporting training, validation, and prediction.
-        
-        Parameters:
-        - train_dataset: The TimeSeriesDataset instance for the training data.
-        - val_dataset: The TimeSeriesDataset instance for the validation data.
-        - test_dataset: The TimeSeriesDataset instance for the test data (optional).
-        - tokenizer: The tokenizer used for tokenizing summaries (e.g., from HuggingFace's Transformers library).
-        - batch_size: Batch size for the training data.
-        - valid_batch_size: Batch size for the validation and test data.
-        - num_workers: Number of workers for data loading (default: 0).
-        - drop_last: Whether to drop the last incomplete batch (default: False).
-        - shuffle_train: Whether to shuffle the training data (default: True).
+        Load the index saved next to the JSONL file `file_path`, or build it in one pass over the
+        file and save it there. The index is rebuilt when the data file is newer.
         """
-        super().__init__()
-        self.train_dataset = train_dataset
-        self.val_dataset = val_dataset
-        self.test_dataset = test_dataset
-        self.tokenizer = tokenizer
-        self.batch_size = batch_size
-        self.valid_batch_size = valid_batch_size
-        self.num_workers = num_workers
-        self.drop_last = drop_last
-        self.shuffle_train = shuffle_train
+        stats_path = file_path + cls.suffix
+        if not refresh and os.path.exists(stats_path) and os.path.getmtime(stats_path) >= os.path.getmtime(file_path):
+            return cls.load(stats_path)
+        with open(file_path, 'r') as f:
+            index = cls.from_records(json.loads(line) for line in f if line.strip())
+        return index.save(stats_path)
 
-        self.tokenizer.pad_token = self.tokenizer.eos_token  # Ensure padding token is set
-    
-    def train_dataloader(self):
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.stats, f)
+        return self
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls(json.load(f))
+
+    def __len__(self):
+        return len(self.stats)
+
+    def __contains__(self, name):
+        return name in self.stats
+
+    def count(self, name):
+        return self.stats[name][0]
+
+    def mean(self, name):
+        return self.stats[name][1]
+
+    def variance(self, name):
+        n, _, m2, _, _ = self.stats[name]
+        return m2 / (n - 1) if n > 1 else 0.
+
+    def std(self, name):
+        return self.variance(name) ** 0.5
+
+    def min(self, name):
+        return self.stats[name][3]
+
+    def max(self, name):
+        return self.stats[name][4]
+
+    def top_k(self, columns, k):
         """
-        Creates and returns a DataLoader for the training dataset.
+        Indices of the `k` columns of `columns` with the largest dataset variance, in decreasing
+        order of variance. Columns missing from the index rank last.
         """
-        sampler = LengthBasedBatchSampler(self.train_dataset, batch_size=self.batch_size, sort_key='summary_input_ids')
-        # loader = TimeSeriesLoader(
-        #     self.train_dataset,
-        #     tokenizer=self.tokenizer,  # Pass the tokenizer
-        #     batch_size=self.batch_size, 
-        #     num_workers=self.num_workers,
-        #     shuffle=self.shuffle_train,
-        #     # batch_sampler=sampler,
-        #     drop_last=self.drop_last
-        # )
-        loader = TimeSeriesLoader(
-            self.train_dataset,
-            tokenizer=self.tokenizer,
-            num_workers=self.num_workers,
-            batch_sampler=sampler
-        )
-        return loader
-    
-    def val_dataloader(self):
+        variances = [self.variance(name) if name in self.stats else -1. for name in columns]
+        order = sorted(range(len(columns)), key=lambda i: (-variances[i], i))
+        return order[:k]
+
+    def __repr__(self):
+        return f"FeatureStatsIndex(n_columns={len(self.stats):,})"
+
+# %% ../nbs/tsdataset.ipynb 18
+class VocabSubset:
+    """
+    Subset of the vocabulary of a tokenizer, with the mapping between full and subset token ids.
+
+    **Parameters:**<br>
+    `token_ids`: list of int, full vocabulary ids of the subset (sorted and deduplicated).<br>
+    `vocab_size`: int, size of the full vocabulary.<br>
+    `config`: dict, optional, how the subset was built (checked by `from_jsonl`).<br>
+    """
+    suffix = '.vocab.json'
+
+    def __init__(self, token_ids, vocab_size, config=None):
+        self.token_ids = torch.tensor(sorted(set(token_ids)), dtype=torch.long)
+        self.vocab_size = vocab_size
+        self.config = config or {}
+        # Full id -> subset id, -1 outside the subset
+        self.index = torch.full((vocab_size,), -1, dtype=torch.long)
+        self.index[self.token_ids] = torch.arange(len(self.token_ids))
+
+    @classmethod
+    def from_texts(cls, texts, tokenizer, min_count=1, max_size=None):
         """
-        Creates and returns a DataLoader for the validation dataset.
+        Build the subset from the token histogram of `texts`: the `max_size` most frequent tokens
+        seen at least `min_count` times, plus the special tokens of the tokenizer.
         """
-        loader = TimeSeriesLoader(
-            self.val_dataset, 
-            tokenizer=self.tokenizer,  # Pass the tokenizer
-            batch_size=self.valid_batch_size, 
-            num_workers=self.num_workers,
-            shuffle=False,
-            drop_last=self.drop_last
-        )
-        return loader
-    
-    def test_dataloader(self):
+        counts = Counter()
+        for text in texts:
+            counts.update(tokenizer(text)['input_ids'])
+        kept = [token for token, count in counts.most_common(max_size) if count >= min_count]
+        config = dict(tokenizer=tokenizer.name_or_path, min_count=min_count, max_size=max_size)
+        return cls(kept + tokenizer.all_special_ids, len(tokenizer), config)
+
+    @classmethod
+    def from_records(cls, records, tokenizer, **kwargs):
+        """Build the subset from the 'anchor_summary' of records, cleaned and terminated as in `TimeSeriesDataset`."""
+        eos_token = tokenizer.eos_token or tokenizer.sep_token
+        texts = (re.sub(r'\s+', ' ', record['anchor_summary']).strip() + " " + eos_token for record in records)
+        return cls.from_texts(texts, tokenizer, **kwargs)
+
+    @classmethod
+    def from_jsonl(cls, file_path, tokenizer, min_count=1, max_size=None, refresh=False):
         """
-        Creates and returns a DataLoader for the test dataset.
+        Load the subset saved next to the JSONL file `file_path`, or build it in one pass over the
+        file and save it there. The subset is rebuilt when the data file is newer or when it was
+        built with another tokenizer or other settings.
         """
-        if self.test_dataset:
-            loader = TimeSeriesLoader(
-                self.test_dataset,
-                tokenizer=self.tokenizer,  # Pass the tokenizer
-                batch_size=self.valid_batch_size, 
-                num_workers=self.num_workers,
-                shuffle=False
-            )
-            return loader
-        return None
+        path = file_path + cls.suffix
+        config = dict(tokenizer=tokenizer.name_or_path, min_count=min_count, max_size=max_size)
+        if not refresh and os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(file_path):
+            subset = cls.load(path)
+            if subset.config == config:
+                return subset
+        with open(file_path, 'r') as f:
+            subset = cls.from_records((json.loads(line) for line in f if line.strip()), tokenizer,
+                                      min_count=min_count, max_size=max_size)
+        return subset.save(path)
+
+    def save(self, path):
+        with open(path, 'w') as f:
+            json.dump(dict(token_ids=self.token_ids.tolist(), vocab_size=self.vocab_size, config=self.config), f)
+        return self
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'r') as f:
+            return cls(**json.load(f))
+
+    def __len__(self):
+        return len(self.token_ids)
+
+    def to_subset(self, token_ids, unknown=-100):
+        """Map full vocabulary ids to subset ids, ids outside the subset become `unknown`."""
+        subset_ids = self.index.to(token_ids.device)[token_ids]
+        return subset_ids.masked_fill(subset_ids < 0, unknown)
+
+    def to_vocab(self, subset_ids):
+        """Map subset ids back to full vocabulary ids."""
+        return self.token_ids.to(subset_ids.device)[subset_ids]
+
+    def coverage(self, token_ids):
+        """Share of the tokens of `token_ids` that belong to the subset."""
+        return (self.index.to(token_ids.device)[token_ids] >= 0).float().mean().item()
+
+    def slice_lm_head(self, backbone):
+        """
+        Frozen LM head scoring only the subset: the rows of the output embeddings of `backbone`
+        (a causal LM) for the subset tokens.
+        """
+        lm_head = backbone.get_output_embeddings()
+        head = torch.nn.Linear(lm_head.in_features, len(self), bias=lm_head.bias is not None,
+                               device=lm_head.weight.device, dtype=lm_head.weight.dtype)
+        token_ids = self.token_ids.to(lm_head.weight.device)
+        with torch.no_grad():
+            head.weight.copy_(lm_head.weight[token_ids])
+            if lm_head.bias is not None:
+                head.bias.copy_(lm_head.bias[token_ids])
+        return head.requires_grad_(False)
+
+    def __repr__(self):
+        return f"VocabSubset(n_tokens={len(self):,}, vocab_size={self.vocab_size:,})"
+
+# %% ../nbs/tsdataset.ipynb 21
+def __getattr__(name):
+    # `TimeSeriesDataModule` pulls in pytorch_lightning, so it is only imported on first use
+    if name == 'TimeSeriesDataModule':
+        from gen_time_llm.datamodule import TimeSeriesDataModule
+        return TimeSeriesDataModule
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,187 @@
+"""Parallel Optuna studies with pruning for the time series to text models"""
+
+# AUTOGENERATED! DO NOT EDIT! File to edit: ../nbs/tune.ipynb.
+
+# %% auto 0
+__all__ = ['PRUNERS', 'ValLossPruningCallback', 'make_pruner', 'make_storage', 'gru_search_space', 'timellm_search_space', 'tune']
+
+# %% ../nbs/tune.ipynb 4
+import os
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+
+import optuna
+import pytorch_lightning as pl
+import torch
+
+# %% ../nbs/tune.ipynb 7
+class ValLossPruningCallback(pl.Callback):
+    """
+    Report the monitored metric to the Optuna `trial` after every validation epoch and stop
+    the training when the pruner decides the trial is not promising.
+
+    **Parameters:**<br>
+    `trial`: optuna.Trial, trial being trained.<br>
+    `monitor`: str, logged metric reported to Optuna.<br>
+    """
+    def __init__(self, trial, monitor='val_loss'):
+        super().__init__()
+        self.trial = trial
+        self.monitor = monitor
+        self.pruned = False
+
+    def on_validation_end(self, trainer, pl_module):
+        if trainer.sanity_checking:
+            return
+        score = trainer.callback_metrics.get(self.monitor)
+        if score is None:
+            return
+        self.trial.report(float(score), step=trainer.current_epoch)
+        if self.trial.should_prune():
+            self.pruned = True
+            trainer.should_stop = True
+
+# %% ../nbs/tune.ipynb 8
+PRUNERS = ['median', 'sha', 'none']
+
+def make_pruner(pruner='median', n_startup_trials=5, n_warmup_steps=1):
+    """Optuna pruner from its name: 'median', 'sha' (successive halving) or 'none'."""
+    assert pruner in PRUNERS, f'{pruner} is not in {PRUNERS}'
+    if pruner == 'median':
+        return optuna.pruners.MedianPruner(n_startup_trials=n_startup_trials, n_warmup_steps=n_warmup_steps)
+    if pruner == 'sha':
+        return optuna.pruners.SuccessiveHalvingPruner()
+    return optuna.pruners.NopPruner()
+
+def make_storage(path):
+    """
+    Local Optuna storage shared by the workers: a SQLite database for `.db` files,
+    a journal file otherwise (safer with many concurrent workers).
+    """
+    if path.endswith('.db'):
+        return f'sqlite:///{path}'
+    try:
+        from optuna.storages.journal import JournalFileBackend
+    except ImportError:
+        from optuna.storages import JournalFileStorage as JournalFileBackend
+    return optuna.storages.JournalStorage(JournalFileBackend(path))
+
+# %% ../nbs/tune.ipynb 10
+def gru_search_space(trial):
+    """Search space of `GRUGPTModel`."""
+    return dict(
+        hidden_size=trial.suggest_int('hidden_size', 64, 256, step=64),
+        num_layers=trial.suggest_int('num_layers', 1, 4),
+        base_lr=trial.suggest_float('base_lr', 1e-5, 1e-2, log=True),
+    )
+
+def timellm_search_space(trial):
+    """Search space of `TimeLLM`."""
+    return dict(
+        d_model=trial.suggest_categorical('d_model', [16, 32, 64]),
+        n_heads=trial.suggest_categorical('n_heads', [4, 8]),
+        d_ff=trial.suggest_categorical('d_ff', [64, 128, 256]),
+        dropout=trial.suggest_float('dropout', 0., 0.3),
+        base_lr=trial.suggest_float('base_lr', 1e-5, 1e-2, log=True),
+    )
+
+# %% ../nbs/tune.ipynb 12
+def _objective(trial, model_cls, search_space, datamodule, model_kwargs, trainer_kwargs, monitor):
+    model = model_cls(**{**model_kwargs, **search_space(trial)})
+    pruning = ValLossPruningCallback(trial, monitor=monitor)
+
+    trainer_kwargs = {
+        'max_steps': model.max_steps,
+        'logger': False,
+        'enable_checkpointing': False,
+        'enable_progress_bar': False,
+        'enable_model_summary': False,
+        **trainer_kwargs,
+    }
+    callbacks = [pruning] + list(model.trainer_kwargs.get('callbacks', [])) + list(trainer_kwargs.pop('callbacks', []))
+    trainer = pl.Trainer(callbacks=callbacks, **trainer_kwargs)
+    trainer.fit(model, datamodule=datamodule)
+
+    if pruning.pruned:
+        raise optuna.TrialPruned(f'Trial pruned at epoch {trainer.current_epoch}.')
+    return trainer.callback_metrics[monitor].item()
+
+def _run_worker(study_name, storage_path, n_trials, pruner, model_cls, search_space, datamodule_fn,
+                model_kwargs, trainer_kwargs, monitor, num_threads):
+    if num_threads is not None:
+        torch.set_num_threads(num_threads)
+    # The pruner is not stored with the study, every worker sets its own
+    study = optuna.load_study(study_name=study_name, storage=make_storage(storage_path), pruner=make_pruner(pruner))
+    # One datamodule per worker, shared by its trials like the frozen LLM
+    datamodule = datamodule_fn()
+    study.optimize(
+        lambda trial: _objective(trial, model_cls, search_space, datamodule, model_kwargs, trainer_kwargs, monitor),
+        n_trials=n_trials,
+    )
+    return n_trials
+
+# %% ../nbs/tune.ipynb 13
+def tune(
+    model_cls,
+    search_space,
+    datamodule_fn,
+    n_trials=20,
+    n_workers=1,
+    storage='optuna.db',
+    study_name='gen_time_llm',
+    pruner='median',
+    model_kwargs=None,
+    trainer_kwargs=None,
+    monitor='val_loss',
+    direction='minimize',
+    mp_context='spawn',
+):
+    """
+    Run a hyperparameter search of `model_cls` in `n_workers` processes.
+
+    **Parameters:**<br>
+    `model_cls`: type, model class, e.g. `GRUGPTModel` or `TimeLLM`.<br>
+    `search_space`: callable, maps an `optuna.Trial` to model keyword arguments, e.g. `gru_search_space`.<br>
+    `datamodule_fn`: callable, builds the LightningDataModule (called once per worker).<br>
+    `n_trials`: int, total number of trials, split across the workers.<br>
+    `n_workers`: int, number of worker processes, 1 runs the study in the current process.<br>
+    `storage`: str, SQLite (`.db`) or journal file shared by the workers.<br>
+    `study_name`: str, name of the study, an existing study in `storage` is resumed.<br>
+    `pruner`: str, 'median', 'sha' (successive halving) or 'none'.<br>
+    `model_kwargs`: dict, fixed model keyword arguments (e.g. `random_seed`, `tokenizer`, `llm`).<br>
+    `trainer_kwargs`: dict, extra `pl.Trainer` keyword arguments.<br>
+    `monitor`: str, metric optimized and reported to the pruner.<br>
+    `direction`: str, 'minimize' or 'maximize'.<br>
+    `mp_context`: str, multiprocessing start method of the workers.<br>
+
+    **Returns:**<br>
+    `study`: optuna.Study, the study loaded from `storage`.<br>
+    """
+    model_kwargs = model_kwargs if model_kwargs is not None else {}
+    trainer_kwargs = trainer_kwargs if trainer_kwargs is not None else {}
+
+    study = optuna.create_study(
+        study_name=study_name,
+        storage=make_storage(storage),
+        pruner=make_pruner(pruner),
+        direction=direction,
+        load_if_exists=True,
+    )
+
+    # Split the trials and the cores between the workers
+    n_workers = max(1, min(n_workers, n_trials))
+    worker_trials = [n_trials // n_workers + (i < n_trials % n_workers) for i in range(n_workers)]
+    num_threads = max(1, (os.cpu_count() or 1) // n_workers)
+    args = (model_cls, search_space, datamodule_fn, model_kwargs, trainer_kwargs, monitor)
+
+    if n_workers == 1:
+        _run_worker(study_name, storage, n_trials, pruner, *args, num_threads=None)
+    else:
+        context = multiprocessing.get_context(mp_context)
+        with ProcessPoolExecutor(max_workers=n_workers, mp_context=context) as pool:
+            futures = [pool.submit(_run_worker, study_name, storage, trials, pruner, *args, num_threads=num_threads)
+                       for trials in worker_trials]
+            for future in futures:
+                future.result()
+
+    return optuna.load_study(study_name=study_name, storage=make_storage(storage), pruner=make_pruner(pruner))